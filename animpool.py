@@ -0,0 +1,206 @@
+"""
+Game başına animation WebSocket havuzu (collector.py); tüm sporlar tek havuzu paylaşır.
+
+- En fazla ANIM_MAX_CONNECTIONS açık bağlantı; fazlası sırada bekler
+- Öncelik: server'ın bildirdiği izlenen game'ler (frontend'de seçili) önce,
+  sonra keşif sırası
+- Yeni bağlantılar saniyede en fazla ANIM_CONNECT_RATE
+- Düşen/açılamayan bağlantı jitter'lı üstel backoff ile tekrar denenir
+- Swarm'dan silinen (null) ya da ANIM_GAME_TTL_S boyunca görülmeyen game'lerin
+  bağlantısı kapatılır
+Kararlar tek bir reconcile döngüsünde verilir; game task'ları sadece bağlanıp dinler.
+"""
+import asyncio
+import logging
+import os
+import random
+import time
+from typing import Dict, Iterable, List, Optional, Set
+
+import websockets
+
+import codec
+from coalesce import CoalescingBuffer
+
+ANIM_URL = "wss://animation.ml.bcua.io/animation_json_v2"
+ANIM_MAX_CONNECTIONS = int(os.getenv("ANIM_MAX_CONNECTIONS", 100))
+ANIM_CONNECT_RATE = float(os.getenv("ANIM_CONNECT_RATE", 5))
+# Token kovası kapasitesi; en az 1 olmalı, yoksa rate < 1'de hiç bağlanılmaz
+ANIM_CONNECT_BURST = max(1.0, ANIM_CONNECT_RATE)
+ANIM_BACKOFF_BASE_S = float(os.getenv("ANIM_BACKOFF_BASE_S", 1))
+ANIM_BACKOFF_MAX_S = float(os.getenv("ANIM_BACKOFF_MAX_S", 60))
+ANIM_GAME_TTL_S = float(os.getenv("ANIM_GAME_TTL_S", 600))
+ANIM_STABLE_S = 30.0  # bu kadar açık kalan bağlantı düşerse backoff sıfırdan başlar
+ANIM_RECONCILE_S = 1.0
+
+class AnimPool:
+    """Yönetilen animation bağlantıları; run() task olarak çalıştırılmalı"""
+
+    def __init__(self, send_queue: CoalescingBuffer, log: logging.Logger):
+        self.send_queue = send_queue
+        self.log = log
+        self.partner_id: Optional[str] = None
+        self.site_ref: Optional[str] = None
+        self.games: Dict[str, float] = {}  # game_id -> son görülme (monotonic); ekleme sırası = keşif sırası
+        self.sports: Dict[str, str] = {}  # game_id -> spor (ingest kaydı etiketi)
+        self.watched: Set[str] = set()
+        self.tasks: Dict[str, asyncio.Task] = {}
+        self.connected: Set[str] = set()
+        self.failures: Dict[str, int] = {}
+        self.retry_at: Dict[str, float] = {}
+        self.counters = {
+            "connects": 0, "connect_failures": 0, "disconnects": 0,
+            "pruned": 0, "preempted": 0, "messages": 0,
+        }
+        self._wake = asyncio.Event()
+        self._tokens = ANIM_CONNECT_BURST
+
+    # --- swarm/server tarafından beslenir ---
+
+    def seen(self, game_ids: Iterable[str], sport: str = "") -> List[str]:
+        """Swarm'da görülen game'leri işaretle; yeni keşfedilenleri döndür"""
+        now = time.monotonic()
+        new = [gid for gid in game_ids if gid not in self.games]
+        for gid in game_ids:
+            self.games[gid] = now
+            self.sports[gid] = sport
+        if new:
+            self._wake.set()
+        return new
+
+    def removed(self, game_ids: Iterable[str]) -> None:
+        """Swarm diff'inde null gelen game'ler: bağlantı bir sonraki turda kapanır"""
+        for gid in game_ids:
+            if self.games.pop(gid, None) is not None:
+                self.sports.pop(gid, None)
+                self.counters["pruned"] += 1
+        self._wake.set()
+
+    def set_watched(self, game_ids: Iterable[str]) -> None:
+        self.watched = set(game_ids)
+        self._wake.set()
+
+    async def follow_watched(self, ws) -> None:
+        """Ingest bağlantısından gelen {"type":"watched","games":[...]} mesajlarını uygula"""
+        try:
+            async for msg in ws:
+                try:
+                    obj = codec.loads(msg)
+                except ValueError:
+                    continue
+                if isinstance(obj, dict) and obj.get("type") == "watched" and isinstance(obj.get("games"), list):
+                    self.set_watched(str(g) for g in obj["games"])
+        except websockets.ConnectionClosed:
+            pass
+
+    def set_credentials(self, partner_id: Optional[str], site_ref: Optional[str]) -> None:
+        self.partner_id = partner_id or self.partner_id
+        self.site_ref = site_ref or self.site_ref
+        self._wake.set()
+
+    def stats(self) -> dict:
+        """Sayaçlar + anlık durum (collector [STATS] logu ve STATS_FILE)"""
+        now = time.monotonic()
+        return {
+            **self.counters,
+            "active": len(self.connected),
+            "connecting": len(self.tasks) - len(self.connected),
+            "known": len(self.games),
+            "watched": len(self.watched),
+            "backoff": sum(1 for t in self.retry_at.values() if t > now),
+        }
+
+    # --- reconcile ---
+
+    def _desired(self) -> List[str]:
+        order = {gid: i for i, gid in enumerate(self.games)}
+        ranked = sorted(self.games, key=lambda gid: (gid not in self.watched, order[gid]))
+        return ranked[:ANIM_MAX_CONNECTIONS]
+
+    def _reconcile(self, now: float, elapsed: float) -> None:
+        stale = [gid for gid, ts in self.games.items() if now - ts > ANIM_GAME_TTL_S]
+        for gid in stale:
+            del self.games[gid]
+            self.sports.pop(gid, None)
+            self.counters["pruned"] += 1
+        for gid in list(self.failures):
+            if gid not in self.games:
+                self.failures.pop(gid, None)
+                self.retry_at.pop(gid, None)
+
+        desired = self._desired()
+        keep = set(desired)
+        for gid, task in list(self.tasks.items()):
+            if gid not in keep:
+                if gid in self.games:
+                    self.counters["preempted"] += 1
+                task.cancel()
+                del self.tasks[gid]
+                self.connected.discard(gid)
+
+        if not self.partner_id or not self.site_ref:
+            return
+        self._tokens = min(ANIM_CONNECT_BURST, self._tokens + elapsed * ANIM_CONNECT_RATE)
+        for gid in desired:
+            if self._tokens < 1:
+                break
+            if gid in self.tasks or self.retry_at.get(gid, 0) > now:
+                continue
+            self._tokens -= 1
+            self.tasks[gid] = asyncio.create_task(self._run_game(gid))
+
+    async def run(self) -> None:
+        last = time.monotonic()
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), ANIM_RECONCILE_S)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            now = time.monotonic()
+            self._reconcile(now, now - last)
+            last = now
+
+    # --- game task'ı ---
+
+    def _backoff(self, gid: str) -> None:
+        n = self.failures.get(gid, 0) + 1
+        self.failures[gid] = n
+        delay = min(ANIM_BACKOFF_MAX_S, ANIM_BACKOFF_BASE_S * 2 ** (n - 1))
+        self.retry_at[gid] = time.monotonic() + delay * random.uniform(0.5, 1.0)
+
+    async def _run_game(self, game_id: str) -> None:
+        url = f"{ANIM_URL}?partner_id={self.partner_id}&site_ref={self.site_ref}&game_id={game_id}"
+        try:
+            ws = await websockets.connect(url, max_size=8_000_000)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.counters["connect_failures"] += 1
+            self.log.warning("[ANIM] failed to connect game %s: %s", game_id, e)
+            self._backoff(game_id)
+            self.tasks.pop(game_id, None)
+            return
+
+        self.counters["connects"] += 1
+        self.connected.add(game_id)
+        sport = self.sports.get(game_id, "")
+        self.log.info("[ANIM] %s game connected: %s (total: %d)", sport, game_id, len(self.connected))
+        opened = time.monotonic()
+        try:
+            async for msg in ws:
+                # Parse server'da yapılır; burada sadece game_id ile etiketlenir
+                if msg[:1] in ("{", "[", b"{", b"["):
+                    self.counters["messages"] += 1
+                    self.send_queue.put_nowait(("anim", game_id, msg, int(time.time() * 1000), sport))
+        except asyncio.CancelledError:
+            await ws.close()
+            raise
+        except Exception as e:
+            self.log.info("[ANIM] game %s connection closed: %s", game_id, e)
+        if time.monotonic() - opened >= ANIM_STABLE_S:
+            self.failures.pop(game_id, None)
+        self.counters["disconnects"] += 1
+        self._backoff(game_id)
+        self.connected.discard(game_id)
+        self.tasks.pop(game_id, None)
@@ -0,0 +1,136 @@
+"""
+Ortak loglama katmanı (server.py, collector.py).
+
+- Seviye: LOG_LEVEL=DEBUG|INFO|WARNING (varsayılan INFO),
+  logger bazında LOG_LEVELS="server=DEBUG,collector=WARNING"
+- Rate limit: extra=rl("anahtar") verilen loglar anahtar başına
+  LOG_RATE_WINDOW saniyede en fazla LOG_RATE_BURST kez yazılır
+- Sink: kayıtlar kuyruğa atılır, format + stdout yazımı ayrı thread'de yapılır
+
+Kapalı seviyedeki log çağrısı isEnabledFor kontrolünde biter; mesajlar
+%-style argümanla verildiği için formatlama maliyeti de olmaz.
+"""
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+from typing import Dict, List
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+LOG_RATE_WINDOW = float(os.getenv("LOG_RATE_WINDOW", 10))
+LOG_RATE_BURST = int(os.getenv("LOG_RATE_BURST", 5))
+LOG_QUEUE_MAX = int(os.getenv("LOG_QUEUE_MAX", 10000))
+
+LOG_FORMAT = "%(asctime)s %(levelname)-7s %(name)s: %(message)s"
+
+_lock = threading.Lock()
+_listener = None
+
+def rl(key: str) -> dict:
+    """Rate limit anahtarı; modül seviyesinde bir kere oluşturup tekrar kullanın"""
+    return {"rl_key": key}
+
+class RateLimitFilter(logging.Filter):
+    """Aynı rl_key için pencere başına en fazla `burst` kayıt geçirir"""
+
+    def __init__(self, window: float, burst: int):
+        super().__init__()
+        self.window = window
+        self.burst = burst
+        self._state: Dict[str, List[float]] = {}  # key -> [pencere başı, geçen, bastırılan]
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = getattr(record, "rl_key", None)
+        if key is None:
+            return True
+        now = time.monotonic()
+        st = self._state.get(key)
+        if st is None or now - st[0] >= self.window:
+            if st is not None and st[2]:
+                record.msg = f"{record.msg} (+{int(st[2])} suppressed)"
+            self._state[key] = [now, 1, 0]
+            return True
+        if st[1] < self.burst:
+            st[1] += 1
+            return True
+        st[2] += 1
+        return False
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    Stdlib QueueHandler formatlamayı çağıran thread'de yapar; burada kayıt
+    olduğu gibi kuyruğa gider, format listener thread'inde yapılır.
+    Kuyruk doluysa kayıt sessizce düşürülür (hot path asla bloklanmaz).
+    """
+
+    dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _DeferredQueueHandler.dropped += 1
+
+def _apply_levels() -> None:
+    logging.getLogger().setLevel(LOG_LEVEL)
+    # websockets her bağlantı için INFO basar; istenirse LOG_LEVELS ile açılır
+    logging.getLogger("websockets").setLevel(logging.WARNING)
+    for item in LOG_LEVELS.split(","):
+        name, _, level = item.partition("=")
+        if name.strip() and level.strip():
+            logging.getLogger(name.strip()).setLevel(level.strip().upper())
+
+def _after_fork_in_child() -> None:
+    # Fork'lanan worker'da listener thread yok; doğrudan stdout'a yaz
+    global _listener
+    if _listener is None:
+        return
+    _listener = None
+    root = logging.getLogger()
+    for h in list(root.handlers):
+        root.removeHandler(h)
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    root.addHandler(handler)
+
+def setup() -> None:
+    global _listener
+    with _lock:
+        if _listener is not None:
+            return
+        q: queue.Queue = queue.Queue(maxsize=LOG_QUEUE_MAX)
+        stream = logging.StreamHandler(sys.stdout)
+        stream.setFormatter(logging.Formatter(LOG_FORMAT))
+        _listener = logging.handlers.QueueListener(q, stream)
+        _listener.start()
+
+        root = logging.getLogger()
+        for h in list(root.handlers):
+            root.removeHandler(h)
+        root.addHandler(_DeferredQueueHandler(q))
+        _apply_levels()
+        os.register_at_fork(after_in_child=_after_fork_in_child)
+        atexit.register(shutdown)
+
+def shutdown() -> None:
+    """Kuyrukta kalan logları yaz ve listener'ı durdur"""
+    global _listener
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+def get_logger(name: str) -> logging.Logger:
+    setup()
+    log = logging.getLogger(name)
+    if not any(isinstance(f, RateLimitFilter) for f in log.filters):
+        log.addFilter(RateLimitFilter(LOG_RATE_WINDOW, LOG_RATE_BURST))
+    return log
@@ -0,0 +1,354 @@
+"""
+Lokal yük ve benchmark aracı (server.py ingest + fan-out yolları).
+
+    python bench.py micro --games 500                  # collect_games / apply_swarm_payload / snapshot_matches
+    python bench.py e2e --games 500 --clients 200      # server.py'yi localhost'ta başlatır, M client bağlar
+    python bench.py e2e --save base.json               # sonucu baseline olarak kaydet
+    python bench.py e2e --compare base.json            # baseline'a göre fark; kötüleşme varsa exit 1
+
+Payload'lar `test` fixture'ı şeklindedir (sport -> region -> competition -> game,
+info.score "a-b", stats.*.team1_value/team2_value). --churn her diff'te değişen
+game oranı, --basketball Basketball game oranı.
+
+e2e gecikmesi: her diff'te değişen game'lerin dakikası tur işaretiyle ("b<n>")
+gönderilir; --probes client'ı matches_delta'da işareti ilk gördükleri anı ölçer.
+Diğer client'lar mesajları parse etmeden sayar (bench process'i darboğaz olmasın).
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from typing import Dict, List, Optional
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+SOCCER_STATS = ["attack", "dangerous_attack", "corner", "shot_on_target", "free_kick", "foul", "throw_in"]
+BASKETBALL_STATS = ["attack", "shot_on_target", "foul", "free_throw", "rebound", "three_point", "two_point"]
+LEAGUES = {"1": ["Süper Lig", "Premier League", "La Liga"], "3": ["BSL", "EuroLeague", "NBA"]}
+
+class LoadGen:
+    """N game'lik swarm state'i; snapshot() tam payload, diff() değişen game'leri üretir"""
+
+    def __init__(self, games: int, churn: float = 0.2, basketball: float = 0.2, seed: int = 1):
+        self.rng = random.Random(seed)
+        self.churn = churn
+        # game_id -> (sport_id, region_id, competition_id, gobj)
+        self.games: Dict[str, tuple] = {}
+        for i in range(games):
+            sid = "3" if self.rng.random() < basketball else "1"
+            rid, cid = str(1 + i % 5), str(1 + i % 3)
+            stats = BASKETBALL_STATS if sid == "3" else SOCCER_STATS
+            gid = str(100000 + i)
+            self.games[gid] = (sid, rid, cid, {
+                "team1_name": f"Home {i}",
+                "team2_name": f"Away {i}",
+                "info": {
+                    "score": "0-0",
+                    "current_game_time": str(self.rng.randint(1, 80)),
+                    "league": {"name": LEAGUES[sid][int(cid) - 1]},
+                    "team1_name": f"Home {i}",
+                    "team2_name": f"Away {i}",
+                },
+                "stats": {s: {"team1_value": self.rng.randint(0, 50), "team2_value": self.rng.randint(0, 50)}
+                          for s in self.rng.sample(stats, 4)},
+            })
+
+    @staticmethod
+    def wrap(games: Dict[str, tuple]) -> dict:
+        sports: dict = {}
+        for gid, (sid, rid, cid, gobj) in games.items():
+            comp = (sports.setdefault(sid, {"region": {}})["region"].setdefault(rid, {"competition": {}})
+                    ["competition"].setdefault(cid, {"game": {}}))
+            comp["game"][gid] = gobj
+        return {"code": 200, "data": {"sport": sports}}
+
+    def snapshot(self) -> dict:
+        return self.wrap(self.games)
+
+    def diff(self, marker: Optional[str] = None) -> dict:
+        """Game'lerin churn oranı kadarında stat artır (bazen gol); marker verilirse dakika o olur"""
+        n = max(1, int(len(self.games) * self.churn))
+        changed = {}
+        for gid in self.rng.sample(list(self.games), n):
+            sid, rid, cid, gobj = self.games[gid]
+            side = self.rng.choice(("team1_value", "team2_value"))
+            stats = {}
+            for name in self.rng.sample(list(gobj["stats"]), self.rng.randint(1, 2)):
+                gobj["stats"][name][side] += 1
+                stats[name] = dict(gobj["stats"][name])
+            info = gobj["info"]
+            if self.rng.random() < 0.02:
+                s1, s2 = (int(x) for x in info["score"].split("-"))
+                info["score"] = f"{s1 + 1}-{s2}" if side == "team1_value" else f"{s1}-{s2 + 1}"
+            if marker is not None:
+                info["current_game_time"] = marker
+            changed[gid] = (sid, rid, cid, {"info": dict(info, league=dict(info["league"])), "stats": stats})
+        return self.wrap(changed)
+
+# --- yardımcılar ---
+
+def percentile(values: List[float], p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+def timeit(fn, rounds: int) -> Dict[str, float]:
+    """fn(i)'yi rounds kez çağır (önce ısınma); çağrı başına p50/p99 (µs), medyandan saniyedeki çağrı"""
+    for i in range(min(rounds, 20)):
+        fn(i)
+    samples = []
+    for i in range(rounds):
+        t0 = time.perf_counter()
+        fn(i)
+        samples.append(time.perf_counter() - t0)
+    p50 = percentile(samples, 50)
+    return {
+        "p50_us": p50 * 1e6,
+        "p99_us": percentile(samples, 99) * 1e6,
+        "ops_per_s": 1 / p50 if p50 else 0.0,
+    }
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def rss_mb(pid: int) -> float:
+    """Process + alt process'lerinin (ingest havuzu, frontend worker'ları) RSS toplamı"""
+    total = 0
+    stack = [pid]
+    while stack:
+        p = stack.pop()
+        try:
+            with open(f"/proc/{p}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1])
+            with open(f"/proc/{p}/task/{p}/children") as f:
+                stack.extend(int(c) for c in f.read().split())
+        except OSError:
+            continue
+    return total / 1024
+
+def metric_means(text: str, names: List[str]) -> Dict[str, float]:
+    """/metrics çıktısından histogram ortalamaları (µs); worker modunda tüm process'ler toplanır"""
+    sums: Dict[str, float] = {}
+    counts: Dict[str, float] = {}
+    for line in text.splitlines():
+        if line.startswith("#"):
+            continue
+        key, _, value = line.rpartition(" ")
+        name = key.split("{", 1)[0]
+        for n in names:
+            if name == n + "_sum":
+                sums[n] = sums.get(n, 0) + float(value)
+            elif name == n + "_count":
+                counts[n] = counts.get(n, 0) + float(value)
+    return {f"server_{n.replace('masis_', '')}_mean_us": sums[n] / counts[n] * 1e6
+            for n in names if counts.get(n)}
+
+# --- micro ---
+
+def run_micro(args) -> Dict[str, float]:
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    sys.path.insert(0, HERE)
+    import server
+
+    gen = LoadGen(args.games, args.churn, args.basketball, args.seed)
+    full = gen.snapshot()
+    diffs = [gen.diff() for _ in range(args.rounds)]
+    engine = server.Engine()
+    engine.apply_swarm_payload(full)
+    results: Dict[str, float] = {}
+
+    def record(name: str, stats: Dict[str, float]) -> None:
+        for k, v in stats.items():
+            results[f"{name}_{k}"] = v
+
+    record("collect_games_full", timeit(lambda i: server.collect_games(full["data"]), args.rounds))
+    record("collect_games_diff", timeit(lambda i: server.collect_games(diffs[i]["data"]), args.rounds))
+    record("apply_swarm_payload_diff", timeit(lambda i: engine.apply_swarm_payload(diffs[i]), args.rounds))
+    record("apply_swarm_payload_full", timeit(lambda i: engine.apply_swarm_payload(full), args.rounds))
+    for sport in ("all", "Basketball"):
+        channel = engine.channels[sport]
+        record(f"snapshot_matches_{sport.lower()}", timeit(lambda i: engine.snapshot_matches(channel), args.rounds))
+    return results
+
+# --- e2e ---
+
+async def _wait_health(port: int, timeout: float = 15.0) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            await asyncio.to_thread(urllib.request.urlopen, f"http://127.0.0.1:{port}/health", timeout=1)
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise RuntimeError("server did not come up")
+            await asyncio.sleep(0.2)
+
+async def run_e2e(args) -> Dict[str, float]:
+    import websockets
+
+    port = args.port or free_port()
+    env = dict(os.environ, PORT=str(port), LOG_LEVEL=os.getenv("LOG_LEVEL", "WARNING"),
+               FRONT_WORKERS=str(args.workers), BROADCAST_TICK_MS=str(args.tick_ms))
+    proc = subprocess.Popen([sys.executable, os.path.join(HERE, "server.py")], cwd=HERE, env=env)
+    gen = LoadGen(args.games, args.churn, args.basketball, args.seed)
+    sent: Dict[str, float] = {}
+    latencies: List[float] = []
+    missed = 0
+    received = {"msgs": 0, "bytes": 0}
+    try:
+        await _wait_health(port)
+        url = f"ws://127.0.0.1:{port}"
+        clients = [await websockets.connect(f"{url}/frontend", max_size=None, compression=None)
+                   for _ in range(args.clients)]
+        probes = min(args.probes, len(clients))
+        seen: List[set] = [set() for _ in range(probes)]
+
+        def on_probe(idx: int, raw, now: float) -> None:
+            obj = json.loads(raw)
+            for msg in obj.get("messages", [obj]):
+                if msg.get("type") != "matches_delta":
+                    continue
+                for m in msg.get("upserts", ()):
+                    marker = m.get("minute")
+                    if marker in sent and marker not in seen[idx]:
+                        seen[idx].add(marker)
+                        latencies.append(now - sent[marker])
+
+        async def consume(idx: int, ws) -> None:
+            try:
+                async for raw in ws:
+                    received["msgs"] += 1
+                    received["bytes"] += len(raw)
+                    if idx < probes:
+                        on_probe(idx, raw, time.perf_counter())
+            except websockets.ConnectionClosed:
+                pass
+
+        readers = [asyncio.create_task(consume(i, ws)) for i, ws in enumerate(clients)]
+        ingest = await websockets.connect(f"{url}/ingest", max_size=None, compression=None)
+        await ingest.send(json.dumps(gen.snapshot()))
+        await asyncio.sleep(1.0)
+        received.update(msgs=0, bytes=0)
+
+        frames = 0
+        interval = 1 / args.rate if args.rate > 0 else 0
+        start = time.perf_counter()
+        while time.perf_counter() - start < args.duration:
+            marker = f"b{frames}"
+            payload = json.dumps(gen.diff(marker))
+            sent[marker] = time.perf_counter()
+            await ingest.send(payload)
+            frames += 1
+            delay = start + frames * interval - time.perf_counter()
+            await asyncio.sleep(max(0.0, delay))
+        elapsed = time.perf_counter() - start
+        await asyncio.sleep(args.drain)
+        rss = rss_mb(proc.pid)
+        metrics_text = (await asyncio.to_thread(
+            lambda: urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5).read())).decode()
+        missed = sum(len(sent) - len(s) for s in seen)
+
+        await ingest.close()
+        for ws in clients:
+            await ws.close()
+        for t in readers:
+            t.cancel()
+    finally:
+        proc.terminate()
+        proc.wait(timeout=15)
+
+    results = {
+        "ingest_frames_per_s": frames / elapsed,
+        "client_msgs_per_s": received["msgs"] / elapsed,
+        "client_bytes_per_s": received["bytes"] / elapsed,
+        "latency_p50_ms": percentile(latencies, 50) * 1000,
+        "latency_p99_ms": percentile(latencies, 99) * 1000,
+        "latency_max_ms": max(latencies, default=0.0) * 1000,
+        "missed_markers": missed,
+        "server_rss_mb": rss,
+    }
+    results.update(metric_means(metrics_text, [
+        "masis_ingest_decode_seconds", "masis_apply_swarm_seconds",
+        "masis_snapshot_seconds", "masis_broadcast_seconds",
+    ]))
+    return results
+
+# --- baseline ---
+
+def compare(results: Dict[str, float], baseline: Dict[str, float], tolerance: float) -> int:
+    """Baseline'a göre farkları yaz; *_per_s büyük, diğerleri küçük olan iyidir. Kötüleşen sayısı döner"""
+    worse = 0
+    print(f"\n{'metric':40s} {'baseline':>12s} {'now':>12s} {'change':>8s}")
+    for name, value in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        change = (value - base) / base if base else 0.0
+        higher_better = name.endswith("_per_s")
+        regressed = (change < -tolerance) if higher_better else (change > tolerance and value - base > 1e-9)
+        worse += regressed
+        print(f"{name:40s} {base:12.3f} {value:12.3f} {change:+8.1%}{'  WORSE' if regressed else ''}")
+    return worse
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = ap.add_subparsers(dest="mode", required=True)
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--games", type=int, default=500)
+    common.add_argument("--churn", type=float, default=0.2, help="diff başına değişen game oranı")
+    common.add_argument("--basketball", type=float, default=0.2, help="Basketball game oranı")
+    common.add_argument("--seed", type=int, default=1)
+    common.add_argument("--save", help="sonucu bu JSON dosyasına baseline olarak yaz")
+    common.add_argument("--compare", help="bu baseline JSON dosyasıyla karşılaştır")
+    common.add_argument("--tolerance", type=float, default=0.10, help="kötüleşme eşiği (0.10 = %%10)")
+
+    micro = sub.add_parser("micro", parents=[common], help="fonksiyon microbenchmark'ları")
+    micro.add_argument("--rounds", type=int, default=200)
+
+    e2e = sub.add_parser("e2e", parents=[common], help="server.py + simüle client'lar")
+    e2e.add_argument("--clients", type=int, default=100)
+    e2e.add_argument("--probes", type=int, default=10, help="gecikme ölçen client sayısı")
+    e2e.add_argument("--duration", type=float, default=20.0)
+    e2e.add_argument("--rate", type=float, default=20.0, help="saniyede ingest frame'i (0 = sınırsız)")
+    e2e.add_argument("--drain", type=float, default=1.0, help="gönderim bitince bekleme (s)")
+    e2e.add_argument("--workers", type=int, default=0, help="FRONT_WORKERS")
+    e2e.add_argument("--tick-ms", type=int, default=100, help="BROADCAST_TICK_MS")
+    e2e.add_argument("--port", type=int, default=0)
+    args = ap.parse_args()
+
+    results = run_micro(args) if args.mode == "micro" else asyncio.run(run_e2e(args))
+    for name, value in results.items():
+        print(f"{name:40s} {value:12.3f}")
+
+    status = 0
+    if args.compare:
+        with open(args.compare) as f:
+            base = json.load(f)
+        if base.get("mode") != args.mode:
+            print(f"[BENCH] baseline mode {base.get('mode')!r} != {args.mode!r}", file=sys.stderr)
+            return 2
+        params = {k: v for k, v in vars(args).items() if k not in ("save", "compare", "tolerance", "port")}
+        diff = {k: (base["params"].get(k), v) for k, v in params.items() if base["params"].get(k) != v}
+        if diff:
+            print(f"[BENCH] parameters differ from baseline: {diff}", file=sys.stderr)
+        status = 1 if compare(results, base["results"], args.tolerance) else 0
+    if args.save:
+        params = {k: v for k, v in vars(args).items() if k not in ("save", "compare", "tolerance", "port")}
+        with open(args.save, "w") as f:
+            json.dump({"mode": args.mode, "params": params, "results": results}, f, indent=2)
+        print(f"[BENCH] baseline saved: {args.save}")
+    return status
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+"""
+Collector -> /ingest arası birleştiren tampon (collector.py).
+
+Sender yetiştiği sürece düz FIFO'dur, frame'ler parse edilmez. Bekleyen
+frame sayısı raw_max'a ulaşınca (ingest kapalı/uyuyor) anahtar başına
+sadece en güncel state tutulur:
+- swarm: game_id başına; game diff'leri derin birleştirilir (null = silindi)
+- anim: game_id başına en yeni mesaj
+- game içermeyen swarm frame'i: en yenisi
+Tampon boşalınca tekrar FIFO'ya döner. Böylece reconnect sonrası gönderilen
+şey birikmiş frame'ler değil, her game'in güncel hali olur.
+"""
+import asyncio
+from collections import OrderedDict, deque
+from typing import Any, Deque, List, Optional, Tuple
+
+import codec
+from applog import get_logger, rl
+
+log = get_logger("collector.buffer")
+_RL_BUFFER = rl("collector.buffer")
+
+# (kind, game_id, payload, captured_ms, sport)
+Item = Tuple[str, Optional[str], Any, int, str]
+
+def deep_merge(dst: dict, src: dict) -> dict:
+    """src'yi dst'nin üstüne yaz; iki tarafta da dict olan alanlar içten birleşir"""
+    for k, v in src.items():
+        cur = dst.get(k)
+        if isinstance(v, dict) and isinstance(cur, dict):
+            deep_merge(cur, v)
+        else:
+            dst[k] = v
+    return dst
+
+def _scalars(node: dict) -> dict:
+    return {k: v for k, v in node.items() if not isinstance(v, (dict, list))}
+
+def split_games(data: dict) -> List[Tuple[str, dict]]:
+    """
+    Swarm data ağacını game başına iskelete böl: (game_id, sadece o game'i
+    içeren ağaç). Yol üstündeki seviyelerin skaler alanları (name vb.) korunur.
+    """
+    out: List[Tuple[str, dict]] = []
+
+    def walk(node: dict, path: list, depth: int):
+        for k, v in node.items():
+            if not isinstance(v, dict):
+                continue
+            if k == "game":
+                for gid, gobj in v.items():
+                    cur = {"game": {gid: gobj}}
+                    for key, scalars in reversed(path):
+                        cur.update(scalars)
+                        cur = {key: cur}
+                    out.append((str(gid), cur))
+            elif depth < 8:
+                walk(v, path + [(k, _scalars(v))], depth + 1)
+
+    walk(data, [], 0)
+    return out
+
+class CoalescingBuffer:
+    """asyncio.Queue yerine: put_nowait hiç bloklamaz, get/get_nowait/empty aynı"""
+
+    def __init__(self, raw_max: int = 32, max_keys: int = 5000, frame_games: int = 200):
+        self.raw_max = raw_max
+        self.max_keys = max_keys
+        # Birleştirilmiş swarm frame'i başına en fazla bu kadar game (server max_size altında kalsın)
+        self.frame_games = frame_games
+        self.raw: Deque[Item] = deque()
+        self.games: "OrderedDict[str, list]" = OrderedDict()  # game_id -> [iskelet, captured_ms, sport]
+        self.latest: "OrderedDict[Tuple[str, str, str], Item]" = OrderedDict()
+        self.coalescing = False
+        self.dropped = 0  # key limiti yüzünden atılan game/anahtar
+        self.coalesced = 0  # birleştirme moduna giren (tek tek gönderilmeyen) frame
+        self._ready = asyncio.Event()
+
+    def qsize(self) -> int:
+        return len(self.raw) + len(self.games) + len(self.latest)
+
+    def empty(self) -> bool:
+        return not (self.raw or self.games or self.latest)
+
+    def put_nowait(self, item: Item) -> None:
+        if self.coalescing:
+            self._fold(item)
+        elif len(self.raw) >= self.raw_max:
+            log.warning("[BUFFER] ingest behind (%d frames), coalescing by game", len(self.raw), extra=_RL_BUFFER)
+            self.coalescing = True
+            while self.raw:
+                self._fold(self.raw.popleft())
+            self._fold(item)
+        else:
+            self.raw.append(item)
+        self._ready.set()
+
+    def _fold(self, item: Item) -> None:
+        self.coalesced += 1
+        kind, game_id, payload, ts, sport = item
+        if kind != "swarm_recv":
+            self._keep_latest((kind, game_id or "", sport), item)
+            return
+        try:
+            obj = codec.loads(payload)
+        except ValueError:
+            return
+        data = obj.get("data") if isinstance(obj, dict) else None
+        parts = split_games(data) if isinstance(data, dict) else []
+        if not parts:
+            self._keep_latest((kind, "", sport), item)
+            return
+        for gid, skel in parts:
+            entry = self.games.get(gid)
+            if entry is None:
+                self._make_room()
+                self.games[gid] = [skel, ts, sport]
+            else:
+                deep_merge(entry[0], skel)
+                entry[1] = ts
+                self.games.move_to_end(gid)
+
+    def _keep_latest(self, key: Tuple[str, str, str], item: Item) -> None:
+        if key not in self.latest:
+            self._make_room()
+        self.latest[key] = item
+        self.latest.move_to_end(key)
+
+    def _make_room(self) -> None:
+        if len(self.games) + len(self.latest) < self.max_keys:
+            return
+        # En uzun süredir güncellenmeyen anahtar gider
+        if self.games:
+            self.games.popitem(last=False)
+        else:
+            self.latest.popitem(last=False)
+        self.dropped += 1
+        log.warning("[BUFFER] key limit reached, dropped %d so far", self.dropped, extra=_RL_BUFFER)
+
+    def get_nowait(self) -> Item:
+        if self.raw:
+            return self.raw.popleft()
+        if self.latest:
+            item = self.latest.popitem(last=False)[1]
+        elif self.games:
+            # Birikmiş game'lerin güncel hali tek swarm frame'inde (spor başına ayrı frame)
+            sport = next(iter(self.games.values()))[2]
+            gids = [gid for gid, entry in self.games.items() if entry[2] == sport][:self.frame_games]
+            data: dict = {}
+            ts = 0
+            for gid in gids:
+                skel, captured_ms, _ = self.games.pop(gid)
+                deep_merge(data, skel)
+                ts = max(ts, captured_ms)
+            item = ("swarm_recv", None, codec.dumps({"code": 0, "data": data}), ts, sport)
+        else:
+            raise asyncio.QueueEmpty
+        if not self.games and not self.latest:
+            self.coalescing = False
+            log.info("[BUFFER] caught up, back to FIFO")
+        return item
+
+    async def get(self) -> Item:
+        while self.empty():
+            self._ready.clear()
+            await self._ready.wait()
+        return self.get_nowait()
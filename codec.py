@@ -0,0 +1,64 @@
+"""
+Ortak JSON codec'i (server.py, collector.py).
+
+Backend başlangıçta seçilir: orjson kuruluysa o, değilse stdlib json.
+JSON_BACKEND=json ile stdlib zorlanabilir. İki backend de aynı şekli üretir:
+UTF-8, kompakt ayırıcılar, non-ASCII escape edilmez.
+
+- loads(bytes | str): bytes'ı önce str'ye çevirmeden çözer
+- dumps(obj) -> bytes: socket/dosyaya doğrudan yazılacak çıktı
+- dumps_text(obj) -> str: WebSocket text frame gereken yerler
+- wrap_raw(kind, raw, extra): zaten JSON olan payload'u parse etmeden envelope'a gömer
+"""
+import json
+import os
+from typing import Any, Optional, Union
+
+JSON_BACKEND = os.getenv("JSON_BACKEND", "auto")
+
+try:
+    if JSON_BACKEND not in ("auto", "orjson"):
+        raise ImportError
+    import orjson
+except ImportError:
+    orjson = None
+
+def _default(o: Any) -> Any:
+    # numpy skalerleri (stats) düz Python tipine
+    if hasattr(o, "item"):
+        return o.item()
+    raise TypeError(f"codec: cannot serialize {type(o).__name__}")
+
+if orjson is not None:
+    BACKEND = "orjson"
+    _OPTS = orjson.OPT_SERIALIZE_NUMPY
+
+    loads = orjson.loads
+
+    def dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj, default=_default, option=_OPTS)
+
+    def dumps_text(obj: Any) -> str:
+        return orjson.dumps(obj, default=_default, option=_OPTS).decode("utf-8")
+else:
+    BACKEND = "json"
+    _encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"), default=_default)
+
+    # stdlib json.loads bytes'ı da kabul eder (UTF-8/16/32 algılar)
+    loads = json.loads
+
+    def dumps(obj: Any) -> bytes:
+        return _encoder.encode(obj).encode("utf-8")
+
+    def dumps_text(obj: Any) -> str:
+        return _encoder.encode(obj)
+
+def wrap_raw(kind: str, raw: Union[bytes, str], extra: Optional[dict] = None) -> bytes:
+    """
+    {"kind": kind, **extra, "payload": <raw>}; raw geçerli JSON olmalı
+    (tekrar escape edilmez). kind her zaman ilk alan: server ona bakarak yönlendirir.
+    """
+    if isinstance(raw, str):
+        raw = raw.encode("utf-8")
+    head = dumps({"kind": kind, **extra}) if extra else dumps({"kind": kind})
+    return head[:-1] + b',"payload":' + raw + b"}"
@@ -0,0 +1,482 @@
+"""
+Çok sporlu veri toplayıcı: tek Chromium, spor başına bir sayfa, ortak
+animation havuzu ve tek /ingest bağlantısı. Her kayıt sporuyla etiketlenir.
+
+    python collector.py                    # COLLECT_SPORTS (varsayılan Soccer,Basketball)
+    python collector.py Basketball         # sadece verilen spor(lar)
+
+    COLLECT_MODE=direct python collector.py  # browser sadece bootstrap'ta
+
+HEADLESS=0 tarayıcıyı görünür açar. Ingest adresi INGEST_URL ile verilir;
+RENDER_URL=false lokal server'a (ws://localhost:8777/ingest) bağlar.
+"""
+import asyncio, itertools, logging, os, re, sys, time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Union
+
+import websockets
+
+import codec
+import ingestlog
+import metrics
+import wire
+from coalesce import CoalescingBuffer
+from animpool import AnimPool
+from applog import get_logger, rl
+
+log = get_logger("collector")
+_RL_SWARM = rl("collector.swarm")
+
+SITE_ORIGIN = "https://www.hepbet103.com"
+SITE_URL = SITE_ORIGIN + "/tr/live/sport/{sport}/"
+SPORT_ICONS = {"Soccer": "⚽", "Basketball": "🏀"}
+COLLECT_SPORTS = [s.strip() for s in os.getenv("COLLECT_SPORTS", "Soccer,Basketball").split(",") if s.strip()]
+HEADLESS = os.getenv("HEADLESS", "1") != "0"
+
+# COLLECT_MODE=direct: browser sadece swarm URL'i, istek frame'leri ve animation
+# kimlik bilgileri için açılır, sonra kapanır; swarm düz websockets client'ıyla akar.
+# SWARM_URL (+ isteğe bağlı SWARM_REQUESTS: JSON istek listesi dosyası) verilirse
+# browser hiç açılmaz (lokal test: swarm_standin.py)
+COLLECT_MODE = os.getenv("COLLECT_MODE", "browser")
+SWARM_URL = os.getenv("SWARM_URL", "")
+SWARM_REQUESTS = os.getenv("SWARM_REQUESTS", "")
+BOOTSTRAP_TIMEOUT_S = 30.0
+BOOTSTRAP_SETTLE_S = 3.0
+DIRECT_IDLE_S = float(os.getenv("DIRECT_IDLE_S", 60))
+DIRECT_MAX_FAILURES = 3
+# Data getirmeyen art arda bootstrap'ler arasında üstel bekleme (Chromium fırtınası olmasın)
+BOOTSTRAP_BACKOFF_S = 30.0
+BOOTSTRAP_BACKOFF_MAX_S = 600.0
+
+# Lokal test için RENDER_URL=false environment variable kullan
+IS_RENDER = os.getenv("RENDER_URL", "true").lower() == "true"
+INGEST_URL = os.getenv("INGEST_URL") or (
+    "wss://animasyon.onrender.com/ingest" if IS_RENDER else "ws://localhost:8777/ingest")
+
+# Ingest v2: kuyrukta biriken frame'ler tek mesajda gider (bekleme eklenmez)
+INGEST_BATCH_MAX = 64
+INGEST_BATCH_BYTES = 4_000_000
+_ingest_seq = itertools.count(1)
+
+# COLLECT_STATS_S'de bir [STATS] logu; STATS_FILE verilirse aynı anda Prometheus
+# text formatında o dosyaya yazılır (node_exporter textfile collector)
+COLLECT_STATS_S = float(os.getenv("COLLECT_STATS_S", 60))
+STATS_FILE = os.getenv("STATS_FILE", "")
+
+SENT_FRAMES = metrics.Counter("masis_collector_sent_frames_total", "Ingest'e gönderilen frame'ler", ["kind"])
+SENT_BYTES = metrics.Counter("masis_collector_sent_bytes_total", "Ingest'e gönderilen payload boyutu")
+DUP_FRAMES = metrics.Counter("masis_collector_duplicate_frames_total",
+                             "Ardışık birebir tekrar olduğu için parse edilmeden atılan frame'ler", ["sport"])
+
+def safe_json(x):
+    try:
+        return codec.loads(x)
+    except:
+        return None
+
+def extract_game_ids(data, removed=None):
+    """Swarm verisinden tüm game ID'lerini çıkar; null gelenler (silinen) removed'a"""
+    game_ids = set()
+
+    def traverse(obj):
+        if isinstance(obj, dict):
+            games = obj.get("game")
+            if isinstance(games, dict):
+                for gid, gobj in games.items():
+                    if not str(gid).strip():
+                        continue
+                    if gobj is None and removed is not None:
+                        removed.add(str(gid))
+                    else:
+                        game_ids.add(str(gid))
+            for k, v in obj.items():
+                # Game objelerinin içinde başka game yok; stats/info ağacına inme
+                if k != "game" or not isinstance(v, dict):
+                    traverse(v)
+        elif isinstance(obj, list):
+            for item in obj:
+                traverse(item)
+
+    traverse(data)
+    return game_ids
+
+
+def make_frame_handler(sport: str, send_queue: CoalescingBuffer, anim_pool: AnimPool):
+    """Bir swarm socket'i için frame handler'ı (browser ya da direct client beslenir)"""
+    icon = SPORT_ICONS.get(sport, "")
+    # Bu socket'in son data frame'inin hash'i (birebir tekrarları atmak için).
+    # Sadece ardışık tekrar atılır: arada başka frame varsa tekrar state'i geri alıyor olabilir
+    last_hash = [None]
+
+    async def on_frame(payload):
+        # payload bazen str bazen bytes gelir; codec ikisini de çözer
+        if isinstance(payload, bytearray):
+            payload = bytes(payload)
+        if not isinstance(payload, (str, bytes)):
+            return
+        captured_ms = int(time.time() * 1000)
+
+        # Parse etmeden ön filtre: data'sız frame'ler (ack, ping) atlanır
+        is_bytes = isinstance(payload, bytes)
+        if (b'"data"' if is_bytes else '"data"') not in payload:
+            return
+        h = hash(payload)
+        if h == last_hash[0]:
+            DUP_FRAMES.inc(labels=(sport,))
+            return
+        last_hash[0] = h
+
+        # "game" geçmeyen frame yeni game getiremez: parse edilmeden iletilir
+        if (b'"game"' if is_bytes else '"game"') not in payload:
+            if (b'"code"' if is_bytes else '"code"') in payload:
+                send_queue.put_nowait(("swarm_recv", None, payload, captured_ms, sport))
+            return
+
+        obj = safe_json(payload)
+        if not isinstance(obj, dict):
+            return
+        if "data" in obj:
+            # Swarm data'dan game ID'leri çıkar
+            removed = set()
+            game_ids = extract_game_ids(obj.get("data"), removed)
+
+            if game_ids and log.isEnabledFor(logging.DEBUG):
+                log.debug("[SWARM] %s detected %d %s games: %s...", icon, len(game_ids), sport, list(game_ids)[:5], extra=_RL_SWARM)
+
+            # Yeni game'ler havuza eklenir, silinenlerin bağlantısı kapanır
+            for gid in anim_pool.seen(game_ids, sport):
+                log.info("[SWARM] %s new %s game discovered: %s", icon, sport, gid)
+            if removed:
+                anim_pool.removed(removed)
+
+        # Swarm mesajını da gönder
+        if "data" in obj and "code" in obj:
+            send_queue.put_nowait(("swarm_recv", None, payload, captured_ms, sport))
+
+    return on_frame
+
+
+def capture_anim_credentials(url: str, sport: str, anim_pool: AnimPool) -> None:
+    """Sayfanın açtığı animation_json socket URL'inden partner_id ve site_ref'i al"""
+    log.info("[PW] animation websocket: %s", url)
+    # Bağlantıları havuz açar
+    partner = re.search(r'partner_id=([^&]+)', url)
+    site_ref = re.search(r'site_ref=([^&\s]+)', url)
+    anim_pool.set_credentials(partner and partner.group(1), site_ref and site_ref.group(1))
+    if site_ref:
+        log.info("[ANIM] %s extracted partner_id=%s, site_ref=%s", SPORT_ICONS.get(sport, ""), anim_pool.partner_id, anim_pool.site_ref)
+
+
+async def sniff_sport(ctx, sport: str, send_queue: CoalescingBuffer, anim_pool: AnimPool):
+    """Bir sporun canlı sayfasını aç ve swarm frame'lerini sporla etiketleyip kuyruğa at"""
+    icon = SPORT_ICONS.get(sport, "")
+    url = SITE_URL.format(sport=sport)
+    page = await ctx.new_page()
+
+    log.info("[PW] %s %s - goto: %s", icon, sport, url)
+
+    async def on_ws(ws):
+        if "animation_json" in ws.url:
+            capture_anim_credentials(ws.url, sport, anim_pool)
+        if "swarm" in ws.url:
+            log.info("[PW] %s swarm websocket: %s", icon, ws.url)
+        # Giden frame'ler sadece istek (get/subscribe); data içermez, dinlenmez
+        ws.on("framereceived", make_frame_handler(sport, send_queue, anim_pool))
+
+    page.on("websocket", on_ws)
+
+    await page.goto(url, wait_until="domcontentloaded")
+    log.info("[PW] %s listening ws frames for %s...", icon, sport)
+
+    while True:
+        await page.wait_for_timeout(1000)
+
+
+async def run_playwright_sniffer(sports: List[str], send_queue: CoalescingBuffer, anim_pool: AnimPool):
+    """Tüm sporlar tek browser context'inde, ayrı sayfalarda"""
+    # Lazy: SWARM_URL ile çalışan direct mod playwright kurulu olmadan da açılır
+    from playwright.async_api import async_playwright
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=HEADLESS)
+        ctx = await browser.new_context()
+        log.info("[PW] will auto-connect animation WS for all detected games...")
+        await asyncio.gather(*(sniff_sport(ctx, sport, send_queue, anim_pool) for sport in sports))
+
+
+# --- direct mod: browser sadece bootstrap için ---
+
+@dataclass
+class SwarmSession:
+    """Sayfanın açtığı swarm socket'i: URL ve gönderdiği istek frame'leri (sırayla)"""
+    url: str
+    requests: List[Union[str, bytes]] = field(default_factory=list)
+    ready: bool = False  # istekler gönderildi ve data geldi
+
+
+def default_requests(sport: str) -> List[str]:
+    """SWARM_URL verilip SWARM_REQUESTS verilmezse: oturum + spor aboneliği"""
+    return [
+        codec.dumps_text({"command": "request_session", "rid": "1",
+                          "params": {"language": "tur", "site_id": 0}}),
+        codec.dumps_text({"command": "get", "rid": "2", "params": {
+            "source": "betting",
+            "what": {"sport": [], "region": [], "competition": [], "game": []},
+            "where": {"sport": {"alias": sport}, "game": {"type": 1}},
+            "subscribe": True,
+        }}),
+    ]
+
+
+def configured_session(sport: str) -> Optional[SwarmSession]:
+    if not SWARM_URL:
+        return None
+    if SWARM_REQUESTS:
+        with open(SWARM_REQUESTS, encoding="utf-8") as f:
+            requests = codec.loads(f.read())
+    else:
+        requests = default_requests(sport)
+    return SwarmSession(SWARM_URL.format(sport=sport), requests, ready=True)
+
+
+async def bootstrap_sessions(sports: List[str], anim_pool: AnimPool) -> Dict[str, SwarmSession]:
+    """
+    Browser'ı açıp her spor sayfasının swarm URL'ini ve istek frame'lerini yakala,
+    animation kimlik bilgilerini al, sonra browser'ı kapat. Sadece hazır olan
+    oturumlar döner; eksik sporları çağıran taraf tekrar dener.
+    """
+    from playwright.async_api import async_playwright
+    sessions: Dict[str, SwarmSession] = {}
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=HEADLESS)
+        try:
+            ctx = await browser.new_context()
+            for sport in sports:
+                page = await ctx.new_page()
+
+                def on_ws(ws, sport=sport):
+                    if "animation_json" in ws.url:
+                        capture_anim_credentials(ws.url, sport, anim_pool)
+                    if "swarm" not in ws.url or sport in sessions:
+                        return
+                    session = sessions[sport] = SwarmSession(ws.url)
+                    log.info("[BOOT] %s swarm websocket: %s", SPORT_ICONS.get(sport, ""), ws.url)
+                    ws.on("framesent", session.requests.append)
+
+                    def on_received(payload):
+                        if session.requests and ('"data"' if isinstance(payload, str) else b'"data"') in payload:
+                            session.ready = True
+                    ws.on("framereceived", on_received)
+
+                page.on("websocket", on_ws)
+                await page.goto(SITE_URL.format(sport=sport), wait_until="domcontentloaded")
+
+            # Swarm abonelikleri oturunca biraz daha bekle: geç gönderilen istekler de yakalansın
+            deadline = time.monotonic() + BOOTSTRAP_TIMEOUT_S
+            while time.monotonic() < deadline:
+                if all(sport in sessions and sessions[sport].ready for sport in sports):
+                    break
+                await asyncio.sleep(0.5)
+            await asyncio.sleep(BOOTSTRAP_SETTLE_S)
+            if not anim_pool.site_ref:
+                log.warning("[BOOT] animation credentials not captured yet")
+        finally:
+            await browser.close()
+
+    ready: Dict[str, SwarmSession] = {}
+    for sport in sports:
+        session = sessions.get(sport)
+        if session is None or not session.ready:
+            log.warning("[BOOT] %s swarm bootstrap failed for %s", SPORT_ICONS.get(sport, ""), sport)
+            continue
+        log.info("[BOOT] %s captured %d request frames", SPORT_ICONS.get(sport, ""), len(session.requests))
+        ready[sport] = session
+    return ready
+
+
+async def stream_direct(session: SwarmSession, sport: str, on_frame) -> bool:
+    """İstekleri tekrar gönder ve swarm data'sını doğrudan akıt; data geldiyse True"""
+    got_data = False
+    async with websockets.connect(session.url, origin=SITE_ORIGIN, max_size=16_000_000) as ws:
+        for req in session.requests:
+            await ws.send(req)
+        log.info("[DIRECT] %s streaming %s", SPORT_ICONS.get(sport, ""), session.url)
+        while True:
+            try:
+                msg = await asyncio.wait_for(ws.recv(), DIRECT_IDLE_S)
+            except asyncio.TimeoutError:
+                log.warning("[DIRECT] %s no data for %ss, reconnecting", SPORT_ICONS.get(sport, ""), DIRECT_IDLE_S)
+                return got_data
+            except websockets.ConnectionClosed:
+                return got_data
+            got_data = True
+            await on_frame(msg)
+
+
+async def run_direct(sports: List[str], send_queue: CoalescingBuffer, anim_pool: AnimPool):
+    """
+    Browser'sız mod: oturum bilgisi bir kere browser'la (ya da SWARM_URL ile)
+    alınır, sonra her spor düz websockets client'ıyla akar. Art arda
+    DIRECT_MAX_FAILURES bağlantı data getiremezse o spor yeniden bootstrap edilir;
+    bootstrap'ler arası bekleme, bir bağlantı data getirene kadar büyür.
+    """
+    sessions: Dict[str, SwarmSession] = {}
+    # Spor başına son data'dan beri yapılan browser bootstrap sayısı
+    boot_attempts: Dict[str, int] = {sport: 0 for sport in sports}
+
+    async def session_for(sport: str) -> SwarmSession:
+        if sport not in sessions:
+            configured = configured_session(sport)
+            if configured:
+                sessions[sport] = configured
+            else:
+                attempts = boot_attempts[sport]
+                if attempts:
+                    delay = min(BOOTSTRAP_BACKOFF_MAX_S, BOOTSTRAP_BACKOFF_S * 2 ** (attempts - 1))
+                    log.warning("[BOOT] %s %s: %d bootstraps without data, next in %.0fs",
+                                SPORT_ICONS.get(sport, ""), sport, attempts, delay)
+                    await asyncio.sleep(delay)
+                boot_attempts[sport] = attempts + 1
+                sessions.update(await bootstrap_sessions([sport], anim_pool))
+        if sport not in sessions:
+            raise RuntimeError(f"swarm bootstrap failed for {sport}")
+        return sessions[sport]
+
+    async def run_sport(sport: str):
+        on_frame = make_frame_handler(sport, send_queue, anim_pool)
+        failures = 0
+        while True:
+            try:
+                session = await session_for(sport)
+                ok = await stream_direct(session, sport, on_frame)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.warning("[DIRECT] %s %s failed: %r", SPORT_ICONS.get(sport, ""), sport, e)
+                ok = False
+            if ok:
+                boot_attempts[sport] = 0
+            failures = 0 if ok else failures + 1
+            if failures >= DIRECT_MAX_FAILURES:
+                log.warning("[DIRECT] %s re-bootstrapping %s via browser", SPORT_ICONS.get(sport, ""), sport)
+                sessions.pop(sport, None)
+                failures = 0
+            await asyncio.sleep(min(30, 2 ** failures))
+
+    if not SWARM_URL:
+        # Tüm sporlar tek browser'la; başaramayanları run_sport backoff'la tekrar dener
+        for sport in sports:
+            boot_attempts[sport] = 1
+        try:
+            sessions.update(await bootstrap_sessions(sports, anim_pool))
+        except Exception as e:
+            log.warning("[BOOT] initial bootstrap failed, retrying per sport: %r", e)
+    await asyncio.gather(*(run_sport(sport) for sport in sports))
+
+
+async def ingest_sender(send_queue: CoalescingBuffer, anim_pool: Optional[AnimPool] = None,
+                        ingest_log: Optional[ingestlog.IngestLogWriter] = None):
+    conns = itertools.count(1)
+    while True:
+        try:
+            async with websockets.connect(
+                INGEST_URL,
+                max_size=8_000_000,
+                ping_interval=20,
+                ping_timeout=20,
+                subprotocols=[wire.INGEST_SUBPROTOCOL],
+                compression=None,
+                extensions=wire.client_deflate()
+            ) as ws:
+                # Server v2'yi kabul ettiyse ham frame'ler batch halinde, header'la gider;
+                # eski server'a payload'u escape etmeden JSON envelope'la
+                v2 = ws.subprotocol == wire.INGEST_SUBPROTOCOL
+                log.info("[INGEST] connected -> %s (%s)", INGEST_URL, "v2" if v2 else "json")
+                conn = next(conns)
+
+                # v2 server izlenen game'leri bildirir; task bağlantı kapanınca kendiliğinden biter
+                watched_task = asyncio.create_task(anim_pool.follow_watched(ws)) if v2 and anim_pool else None
+
+                while True:
+                    # (kind, game_id, payload, captured_ms, sport): swarm_recv veya game_id etiketli anim
+                    items = [await send_queue.get()]
+                    if not v2:
+                        kind, game_id, payload, _, sport = items[0]
+                        extra = {"game_id": game_id, "sport": sport} if game_id else {"sport": sport}
+                        msg = codec.wrap_raw(kind, payload, extra)
+                        await ws.send(msg)
+                        if ingest_log is not None:
+                            ingest_log.append(msg, conn)
+                        SENT_FRAMES.inc(labels=(kind,))
+                        SENT_BYTES.inc(len(payload))
+                        continue
+                    size = len(items[0][2])
+                    while not send_queue.empty() and len(items) < INGEST_BATCH_MAX and size < INGEST_BATCH_BYTES:
+                        items.append(send_queue.get_nowait())
+                        size += len(items[-1][2])
+                    msg = wire.pack_ingest([
+                        wire.IngestRecord(wire.INGEST_KINDS[kind], wire.SOURCE_SPORTS.get(sport, 0),
+                                          next(_ingest_seq), ts, game_id or "", payload)
+                        for kind, game_id, payload, ts, sport in items
+                    ])
+                    await ws.send(msg)
+                    if ingest_log is not None:
+                        ingest_log.append(msg, conn)
+                    for kind, _, payload, _, _ in items:
+                        SENT_FRAMES.inc(labels=(kind,))
+                    SENT_BYTES.inc(size)
+
+        except Exception as e:
+            log.warning("[INGEST] reconnecting… %r", e)
+            await asyncio.sleep(1)
+
+
+def write_stats_file(path: str) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(metrics.render(metrics.collect()))
+    os.replace(tmp, path)
+
+
+async def stats_reporter(send_queue: CoalescingBuffer, anim_pool: AnimPool):
+    """Kuyruk derinliği, animation socket'leri ve atılan frame'ler: log + STATS_FILE"""
+    metrics.Gauge("masis_collector_queue_depth", "Gönderilmeyi bekleyen kayıt", send_queue.qsize)
+    metrics.Gauge("masis_collector_coalescing", "Tampon birleştirme modunda mı", lambda: int(send_queue.coalescing))
+    metrics.Gauge("masis_collector_coalesced_frames", "Birleştirme moduna giren frame'ler", lambda: send_queue.coalesced)
+    metrics.Gauge("masis_collector_dropped_keys", "Key limiti yüzünden atılan game'ler", lambda: send_queue.dropped)
+    metrics.Gauge("masis_collector_anim", "Animation havuzu durumu", anim_pool.stats, ["stat"])
+    while True:
+        await asyncio.sleep(COLLECT_STATS_S)
+        sent = sum(SENT_FRAMES.values.values())
+        duplicate = sum(DUP_FRAMES.values.values())
+        log.info("[STATS] queue=%d coalescing=%d coalesced=%d dropped=%d sent=%d duplicate=%d %s",
+                 send_queue.qsize(), send_queue.coalescing, send_queue.coalesced, send_queue.dropped, sent, duplicate,
+                 " ".join(f"anim_{k}={v}" for k, v in anim_pool.stats().items()))
+        if STATS_FILE:
+            try:
+                write_stats_file(STATS_FILE)
+            except OSError as e:
+                log.warning("[STATS] write failed: %r", e)
+
+
+async def main(sports: Optional[List[str]] = None):
+    sports = sports or COLLECT_SPORTS
+    log.info("[CONFIG] sports: %s (%s mode) - INGEST_URL: %s", ", ".join(sports), COLLECT_MODE, INGEST_URL)
+    q = CoalescingBuffer()
+    anim_pool = AnimPool(q, log)
+    await asyncio.gather(
+        run_direct(sports, q, anim_pool) if COLLECT_MODE == "direct" else run_playwright_sniffer(sports, q, anim_pool),
+        ingest_sender(q, anim_pool, ingestlog.open_from_env()),
+        anim_pool.run(),
+        stats_reporter(q, anim_pool),
+    )
+
+
+def run(sports: Optional[List[str]] = None):
+    try:
+        asyncio.run(main(sports))
+    except KeyboardInterrupt:
+        log.info("[EXIT] stopped by user")
+
+
+if __name__ == "__main__":
+    run(sys.argv[1:] or None)
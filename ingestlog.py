@@ -0,0 +1,157 @@
+"""
+Append-only, segmentli ingest kaydı (server.py, collector.py, replay.py).
+
+INGEST_LOG_DIR verilirse /ingest üzerinden geçen her WebSocket mesajı olduğu
+gibi (v1 JSON envelope ya da v2 MI2 batch) bu dizine yazılır:
+
+- Segment: "<başlangıç ms>-<pid>.mil", SEGMENT_MAGIC ile başlar,
+  INGEST_LOG_SEGMENT_MB dolunca yenisi açılır
+- Kayıt: _RECORD_HEAD (gövde uzunluğu, yakalama ms, bağlantı no, flag) + gövde;
+  gövde zlib ile sıkıştırılır (kazanç yoksa ham kalır)
+- Yazım ayrı thread'de: ingest yolu sadece kuyruğa ekler, kuyruk doluysa kayıt
+  atılır (dropped), ingest hiç beklemez
+
+Okuma segmentleri mmap ile açar; yarım kalan son kayıt (crash) sessizce atlanır.
+"""
+import atexit
+import mmap
+import os
+import queue
+import struct
+import threading
+import time
+import zlib
+from typing import Iterator, List, NamedTuple, Optional, Union
+
+from applog import get_logger, rl
+
+log = get_logger("ingestlog")
+_RL_LOG = rl("ingestlog")
+
+INGEST_LOG_DIR = os.getenv("INGEST_LOG_DIR", "")
+INGEST_LOG_SEGMENT_MB = float(os.getenv("INGEST_LOG_SEGMENT_MB", 64))
+INGEST_LOG_LEVEL = int(os.getenv("INGEST_LOG_LEVEL", 1))  # zlib seviyesi; 1 = hızlı
+INGEST_LOG_QUEUE_MAX = 10000
+
+SEGMENT_MAGIC = b"MIL1"
+SEGMENT_SUFFIX = ".mil"
+FLAG_TEXT = 0x01  # WebSocket text frame (UTF-8); yoksa binary
+FLAG_ZLIB = 0x02
+
+# body_len, captured_ms, conn, flags
+_RECORD_HEAD = struct.Struct(">IQIB")
+
+class Record(NamedTuple):
+    captured_ms: int
+    conn: int  # kaydeden process'teki ingest bağlantı numarası
+    data: Union[str, bytes]
+
+def encode_record(data: Union[str, bytes], captured_ms: int, conn: int, level: int = INGEST_LOG_LEVEL) -> bytes:
+    flags = 0
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+        flags |= FLAG_TEXT
+    body = zlib.compress(data, level) if level > 0 else data
+    if len(body) < len(data):
+        flags |= FLAG_ZLIB
+    else:
+        body = data
+    return _RECORD_HEAD.pack(len(body), captured_ms, conn, flags) + body
+
+class IngestLogWriter:
+    """Mesajları arka plan thread'inde sıkıştırıp segmentlere ekler"""
+
+    def __init__(self, directory: str, segment_bytes: int = int(INGEST_LOG_SEGMENT_MB * 1024 * 1024),
+                 level: int = INGEST_LOG_LEVEL):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.level = level
+        self.dropped = 0
+        self.written = 0
+        self._queue: "queue.Queue" = queue.Queue(maxsize=INGEST_LOG_QUEUE_MAX)
+        self._thread = threading.Thread(target=self._run, name="ingest-log", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def append(self, data: Union[str, bytes], conn: int, captured_ms: Optional[int] = None) -> None:
+        try:
+            self._queue.put_nowait((data, captured_ms or int(time.time() * 1000), conn))
+        except queue.Full:
+            self.dropped += 1
+            log.warning("[INGESTLOG] writer behind, dropped %d records", self.dropped, extra=_RL_LOG)
+
+    def _open_segment(self, ts: int):
+        path = os.path.join(self.directory, f"{ts:013d}-{os.getpid()}{SEGMENT_SUFFIX}")
+        f = open(path, "ab")
+        if f.tell() == 0:
+            f.write(SEGMENT_MAGIC)
+        log.info("[INGESTLOG] segment: %s", path)
+        return f
+
+    def _run(self) -> None:
+        f = None
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    break
+                data, ts, conn = item
+                if f is None or f.tell() >= self.segment_bytes:
+                    if f is not None:
+                        f.close()
+                    f = self._open_segment(ts)
+                f.write(encode_record(data, ts, conn, self.level))
+                self.written += 1
+                # Kuyruk boşaldıysa diske ver: crash'te en fazla o an yazılan kayıt yarım kalır
+                if self._queue.empty():
+                    f.flush()
+        except OSError as e:
+            log.error("[INGESTLOG] write failed, recording stopped: %r", e)
+        finally:
+            if f is not None:
+                f.close()
+
+    def close(self) -> None:
+        if not self._thread.is_alive():
+            return
+        self._queue.put(None)
+        self._thread.join(timeout=10)
+
+def open_from_env() -> Optional[IngestLogWriter]:
+    """INGEST_LOG_DIR verildiyse writer, yoksa None"""
+    if not INGEST_LOG_DIR:
+        return None
+    log.info("[INGESTLOG] recording ingest to %s", INGEST_LOG_DIR)
+    return IngestLogWriter(INGEST_LOG_DIR)
+
+def segments(path: str) -> List[str]:
+    """Dizin verildiyse içindeki segmentler zaman sırasıyla, dosya verildiyse kendisi"""
+    if os.path.isdir(path):
+        return sorted(os.path.join(path, name) for name in os.listdir(path) if name.endswith(SEGMENT_SUFFIX))
+    return [path]
+
+def read_segment(path: str) -> Iterator[Record]:
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size <= len(SEGMENT_MAGIC):
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if mm[:len(SEGMENT_MAGIC)] != SEGMENT_MAGIC:
+                raise ValueError(f"not an ingest log segment: {path}")
+            pos = len(SEGMENT_MAGIC)
+            end = len(mm)
+            while pos + _RECORD_HEAD.size <= end:
+                n, ts, conn, flags = _RECORD_HEAD.unpack_from(mm, pos)
+                start = pos + _RECORD_HEAD.size
+                if start + n > end:
+                    log.warning("[INGESTLOG] truncated record at %s:%d", path, pos)
+                    return
+                body = mm[start:start + n]
+                pos = start + n
+                if flags & FLAG_ZLIB:
+                    body = zlib.decompress(body)
+                yield Record(ts, conn, body.decode("utf-8") if flags & FLAG_TEXT else body)
+
+def read_log(path: str) -> Iterator[Record]:
+    for seg in segments(path):
+        yield from read_segment(seg)
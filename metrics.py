@@ -0,0 +1,136 @@
+"""
+Bağımlılıksız Prometheus metrikleri (server.py /metrics, collector.py STATS_FILE).
+
+- Counter / Histogram: hot path'te sadece toplama ve bisect
+- Gauge: değer scrape anında fn() ile okunur (dict dönerse label'lı seriler)
+- collect() aileleri JSON'a uygun listeler olarak verir: FRONT_WORKERS modunda
+  core kendi ailelerini worker'lara yollar, worker render() ile birleştirir
+
+Rate'ler (frame/s, byte/s) Prometheus tarafında rate(..._total) ile hesaplanır.
+"""
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# (suffix, labels, value)
+Sample = Tuple[str, Dict[str, str], float]
+# [name, type, help, samples]
+Family = list
+
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_registry: List["Metric"] = []
+
+class Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        _registry.append(self)
+
+    def _labels(self, values: Tuple[str, ...]) -> Dict[str, str]:
+        return dict(zip(self.labelnames, values))
+
+    def samples(self) -> List[Sample]:
+        raise NotImplementedError
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self.values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, labels: Tuple[str, ...] = ()) -> None:
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def samples(self) -> List[Sample]:
+        return [("", self._labels(k), v) for k, v in self.values.items()]
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, fn: Callable[[], object], labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self.fn = fn
+
+    def samples(self) -> List[Sample]:
+        value = self.fn()
+        if isinstance(value, dict):
+            return [("", self._labels(k if isinstance(k, tuple) else (k,)), v) for k, v in value.items()]
+        return [("", {}, value)]
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help)
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # son hücre +Inf
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def time(self) -> "_Timer":
+        return _Timer(self)
+
+    def samples(self) -> List[Sample]:
+        out: List[Sample] = []
+        total = 0
+        for le, n in zip((*self.buckets, "+Inf"), self.counts):
+            total += n
+            out.append(("_bucket", {"le": str(le)}, total))
+        out.append(("_sum", {}, self.sum))
+        out.append(("_count", {}, total))
+        return out
+
+class _Timer:
+    """with HIST.time(): ... — süre saniye olarak gözlenir"""
+    __slots__ = ("hist", "start")
+
+    def __init__(self, hist: Histogram):
+        self.hist = hist
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.hist.observe(time.perf_counter() - self.start)
+
+def collect(labels: Optional[Dict[str, str]] = None) -> List[Family]:
+    """Kayıtlı tüm metrikler; labels verilirse her örneğe eklenir"""
+    extra = labels or {}
+    return [[m.name, m.kind, m.help, [(sfx, {**extra, **lbl}, v) for sfx, lbl, v in m.samples()]]
+            for m in _registry]
+
+def _escape(v: str) -> str:
+    return v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_value(v: float) -> str:
+    v = float(v)
+    return str(int(v)) if v.is_integer() else repr(v)
+
+def render(*sources: List[Family]) -> bytes:
+    """Aileleri isim bazında birleştirip text exposition formatında yaz"""
+    merged: Dict[str, Family] = {}
+    for families in sources:
+        for name, kind, help, samples in families:
+            fam = merged.get(name)
+            if fam is None:
+                merged[name] = [name, kind, help, list(samples)]
+            else:
+                fam[3].extend(samples)
+    lines = []
+    for name, kind, help, samples in merged.values():
+        lines.append(f"# HELP {name} {help}")
+        lines.append(f"# TYPE {name} {kind}")
+        for sfx, lbl, v in samples:
+            tags = ",".join(f'{k}="{_escape(str(val))}"' for k, val in lbl.items())
+            lines.append(f"{name}{sfx}{{{tags}}} {_format_value(v)}" if tags else f"{name}{sfx} {_format_value(v)}")
+    return ("\n".join(lines) + "\n").encode("utf-8")
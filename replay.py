@@ -0,0 +1,156 @@
+"""
+INGEST_LOG_DIR kaydını (ingestlog.py) tekrar oynatır.
+
+    python replay.py ingest-log/                       # /ingest'e 1x hızla
+    python replay.py ingest-log/ --speed 10            # 10x
+    python replay.py ingest-log/ --speed 0             # bekleme yok, olabildiğince hızlı
+    python replay.py ingest-log/ --info                # segment/kayıt/zaman aralığı özeti
+    python replay.py ingest-log/ --offline --profile apply.prof
+
+Online modda kaydedilen her bağlantı (conn) için ayrı bir /ingest bağlantısı
+açılır ve mesajlar aynen (v1 JSON ya da v2 batch) gönderilir. --offline modda
+server'a gerek yoktur: mesajlar bu process'te decode edilip bir Engine'e
+uygulanır (apply_swarm_payload yolu), süreler yazılır; --profile ile cProfile çıktısı.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from typing import Dict
+
+import ingestlog
+
+DEFAULT_URL = os.getenv("INGEST_URL", "ws://localhost:8777/ingest")
+PROGRESS_S = 5.0
+
+def info(path: str) -> None:
+    for seg in ingestlog.segments(path):
+        n = 0
+        raw = 0
+        first = last = None
+        conns = set()
+        for rec in ingestlog.read_segment(seg):
+            n += 1
+            raw += len(rec.data)
+            first = rec.captured_ms if first is None else first
+            last = rec.captured_ms
+            conns.add(rec.conn)
+        span = (last - first) / 1000 if n else 0.0
+        print(f"{seg}: {n} records, {os.path.getsize(seg) / 1e6:.1f} MB on disk ({raw / 1e6:.1f} MB raw), "
+              f"{span:.0f} s, {len(conns)} connections")
+
+async def replay(path: str, url: str, speed: float) -> None:
+    import websockets
+    import wire
+
+    conns: Dict[int, "websockets.WebSocketClientProtocol"] = {}
+    drains = []
+
+    async def drain(ws):
+        # Server'ın "watched" mesajları okunmazsa tampon dolar
+        try:
+            async for _ in ws:
+                pass
+        except websockets.ConnectionClosed:
+            pass
+
+    async def connection(conn: int):
+        ws = conns.get(conn)
+        if ws is None:
+            ws = conns[conn] = await websockets.connect(url, max_size=8_000_000, compression=None,
+                                                        subprotocols=[wire.INGEST_SUBPROTOCOL])
+            drains.append(asyncio.create_task(drain(ws)))
+        return ws
+
+    sent = 0
+    size = 0
+    t0 = None
+    start = last_report = time.monotonic()
+    try:
+        for rec in ingestlog.read_log(path):
+            if t0 is None:
+                t0 = rec.captured_ms
+            if speed > 0:
+                delay = start + (rec.captured_ms - t0) / 1000 / speed - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            ws = await connection(rec.conn)
+            await ws.send(rec.data)
+            sent += 1
+            size += len(rec.data)
+            now = time.monotonic()
+            if now - last_report >= PROGRESS_S:
+                last_report = now
+                print(f"[REPLAY] {sent} messages, {size / 1e6:.1f} MB, log time +{(rec.captured_ms - t0) / 1000:.0f} s")
+    finally:
+        for ws in conns.values():
+            await ws.close()
+        for t in drains:
+            t.cancel()
+    elapsed = time.monotonic() - start
+    print(f"[REPLAY] done: {sent} messages, {size / 1e6:.1f} MB in {elapsed:.1f} s "
+          f"({sent / elapsed if elapsed else 0:.0f} msg/s)")
+
+def offline(path: str) -> None:
+    """Server'daki ingest yolunu bu process'te, ağ ve havuz olmadan çalıştır"""
+    import logging
+    import server
+    import wire
+
+    # Yeni game/sport INFO logları süreleri boğmasın
+    server.log.setLevel(max(server.log.level, logging.WARNING))
+
+    engine = server.Engine()
+    decode_s = apply_s = 0.0
+    frames = events = 0
+    for rec in ingestlog.read_log(path):
+        t = time.perf_counter()
+        msg = rec.data
+        if isinstance(msg, bytes) and msg[:3] == wire.INGEST_MAGIC:
+            decoded = [server.decode_anim(r.game_id, r.payload) if r.kind == wire.KIND_ANIM
+                       else server.decode_swarm(r.payload) for r in wire.unpack_ingest(msg)]
+        else:
+            decoded = [server.decode_ingest(msg)]
+        t2 = time.perf_counter()
+        decode_s += t2 - t
+        for frame in decoded:
+            if isinstance(frame, server.AnimFrame):
+                events += len(engine.apply_anim(frame))
+            elif frame:
+                events += len(engine.apply_frame(frame))
+            frames += 1
+        apply_s += time.perf_counter() - t2
+    print(f"[OFFLINE] {frames} frames, {events} events, {len(engine.games)} games")
+    if frames:
+        print(f"[OFFLINE] decode {decode_s:.3f} s ({decode_s / frames * 1e6:.0f} µs/frame), "
+              f"apply {apply_s:.3f} s ({apply_s / frames * 1e6:.0f} µs/frame)")
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("path", help="INGEST_LOG_DIR dizini ya da tek segment (.mil)")
+    ap.add_argument("--url", default=DEFAULT_URL)
+    ap.add_argument("--speed", type=float, default=1.0, help="1 = kayıt hızı, N = N kat, 0 = beklemesiz")
+    ap.add_argument("--info", action="store_true", help="sadece özet yaz")
+    ap.add_argument("--offline", action="store_true", help="server'a göndermeden Engine'e uygula")
+    ap.add_argument("--profile", help="--offline'ı cProfile altında çalıştır, istatistikleri buraya yaz")
+    args = ap.parse_args()
+
+    if args.info:
+        info(args.path)
+    elif args.offline:
+        if args.profile:
+            import cProfile
+            cProfile.runctx("offline(path)", globals(), {"path": args.path}, args.profile)
+            print(f"[OFFLINE] profile written: {args.profile} (python -m pstats {args.profile})")
+        else:
+            offline(args.path)
+    else:
+        try:
+            asyncio.run(replay(args.path, args.url, args.speed))
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
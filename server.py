@@ -1,23 +1,118 @@
 import asyncio
-import json
+import gzip
+import logging
+import multiprocessing
 import os
+import re
+import signal
+import struct
+import threading
 import time
-from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional, Tuple
+import zlib
+from concurrent.futures import BrokenExecutor, Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from collections import OrderedDict, deque
+from dataclasses import asdict, dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
 from http import HTTPStatus
+from itertools import count, islice
 
+import numpy as np
 import websockets
 
+import codec
+import ingestlog
+import metrics
+import wire
+from applog import get_logger, rl
+
+log = get_logger("server")
+
+# Hot path rate limit anahtarları
+_RL_FRAME = rl("server.frame")
+_RL_GAME = rl("server.game")
+_RL_SPORT = rl("server.sport")
+_RL_FRONT = rl("server.front")
+
 HOST = "0.0.0.0"
 PORT = int(os.getenv("PORT", 8777))
 
+# Frontend başına giden kuyruk limiti ve taşma politikası:
+#   drop_oldest -> en eski mesajı at (client seq boşluğu görüp resync ister)
+#   coalesce    -> kuyruğu boşalt, yerine tek bir güncel snapshot koy
+#   disconnect  -> yetişemeyen client'ı kapat
+FRONT_QUEUE_MAX = int(os.getenv("FRONT_QUEUE_MAX", 256))
+FRONT_OVERFLOW = os.getenv("FRONT_OVERFLOW", "coalesce")
+
+# Büyük swarm frame'lerinin decode + game çıkarma işi event loop dışında yapılır.
+# INGEST_WORKERS=0 -> loop üzerinde (eski davranış); INGEST_POOL=process|thread
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", 1))
+INGEST_POOL = os.getenv("INGEST_POOL", "process")
+
+# Biten/sessiz maçların temizliği: GAME_TTL_S boyunca güncellenmeyen veya
+# is_live=0 olan game'ler her SWEEP_INTERVAL_S'de silinir.
+# ARCHIVE_PATH verilirse son halleri gzip JSON satırı olarak eklenir.
+GAME_TTL_S = float(os.getenv("GAME_TTL_S", 1800))
+SWEEP_INTERVAL_S = float(os.getenv("SWEEP_INTERVAL_S", 30))
+ARCHIVE_PATH = os.getenv("ARCHIVE_PATH", "")
+
+# Warm restart: CHECKPOINT_PATH verilirse game'ler (takımlar, skor, stat'lar,
+# sport kilidi) CHECKPOINT_S'de bir (değişiklik varsa) ve kapanışta atomik olarak
+# yazılır, açılışta yüklenir. Böylece restart sonrası liste hemen dolu gelir ve
+# ilk frame'deki stat artışları event üretir
+CHECKPOINT_PATH = os.getenv("CHECKPOINT_PATH", "")
+CHECKPOINT_S = float(os.getenv("CHECKPOINT_S", 30))
+
+# Frontend yayını tick'li: event'ler ve değişen maçlar BROADCAST_TICK_MS boyunca
+# birikir, client başına tick'te tek frame gider ("batch"). 0 -> her frame'de anında.
+# BROADCAST_EVENTS_IMMEDIATE=1 -> event'ler beklemeden, maç listesi tick'te gider.
+# Animation event'leri game'e abone client'lara her durumda beklemeden gider
+BROADCAST_TICK_MS = int(os.getenv("BROADCAST_TICK_MS", 100))
+BROADCAST_EVENTS_IMMEDIATE = os.getenv("BROADCAST_EVENTS_IMMEDIATE", "0") == "1"
+
+# animation_json_v2 event'leri stat diff'lerinden önce gelir; aynı olay
+# ANIM_DEDUPE_MS içinde iki kaynaktan da gelirse bir kere gösterilir
+ANIM_DEDUPE_MS = int(os.getenv("ANIM_DEDUPE_MS", 15000))
+
+# Yeniden bağlanan client kaçırdığı event'leri alır: game başına son
+# EVENT_REPLAY_PER_GAME event tutulur. Seq'ler process başında zaman tabanlı
+# başlar, restart sonrası eski seq'ler "kapsanmıyor" sayılır
+EVENT_REPLAY_PER_GAME = int(os.getenv("EVENT_REPLAY_PER_GAME", 64))
+
+# FRONT_WORKERS>0: bu process core olur (Engine + ingest, CORE_SOCKET Unix
+# socket'inde), PORT'u SO_REUSEPORT ile N frontend worker process'i paylaşır.
+# Worker'lar core'un tick mesajlarını alıp kendi client'larına encode/yönlendirir;
+# worker'a düşen /ingest bağlantıları core'a aktarılır. 0 -> tek process
+FRONT_WORKERS = int(os.getenv("FRONT_WORKERS", 0))
+CORE_SOCKET = os.getenv("CORE_SOCKET", "") or f"/tmp/masis-core-{PORT}.sock"
+
+# v2 collector'lara frontend'de izlenen game'ler bildirilir (animation
+# bağlantı önceliği için); değişiklik varsa en fazla WATCHED_PUSH_S'de bir
+WATCHED_PUSH_S = float(os.getenv("WATCHED_PUSH_S", 2))
+
+# /metrics (Prometheus text). Worker modunda her worker kendi metriklerini
+# METRICS_PUSH_S'de bir core'a, core kendisininkilerle diğer worker'larınkileri
+# worker'lara yollar; scrape hangi worker'a düşerse düşsün tüm process'ler
+# (process="core" / "worker-N" label'ıyla) gelir
+METRICS_PUSH_S = 5.0
+
+INGEST_FRAMES = metrics.Counter("masis_ingest_frames_total", "Ingest'ten gelen frame'ler", ["kind"])
+INGEST_BYTES = metrics.Counter("masis_ingest_bytes_total", "Ingest WebSocket mesaj boyutu")
+DECODE_TIME = metrics.Histogram("masis_ingest_decode_seconds", "Frame decode (parse + extract) süresi")
+APPLY_TIME = metrics.Histogram("masis_apply_swarm_seconds", "Engine.apply_frame (apply_swarm_payload) süresi")
+SNAPSHOT_TIME = metrics.Histogram("masis_snapshot_seconds", "snapshot_matches + encode süresi (cache miss)")
+BROADCAST_TIME = metrics.Histogram("masis_broadcast_seconds", "Event/maç yayını ve client kuyruklarına ekleme süresi")
+EVENTS = metrics.Counter("masis_events_total", "Üretilen event'ler", ["etype", "sport"])
+FRONT_SEND_LAG = metrics.Histogram("masis_front_send_lag_seconds", "Mesajın client kuyruğunda bekleme süresi",
+                                   metrics.LAG_BUCKETS)
+FRONT_DROPPED = metrics.Counter("masis_front_dropped_total", "Yavaş client kuyruklarından atılan mesajlar")
+
 def jloads_maybe(s: Any) -> Any:
     if isinstance(s, (dict, list)):
         return s
-    if not isinstance(s, str):
+    if not isinstance(s, (str, bytes)):
         return None
     try:
-        return json.loads(s)
+        return codec.loads(s)
     except Exception:
         return None
 
@@ -25,6 +120,8 @@ def now_ms() -> int:
     return int(time.time() * 1000)
 
 def safe_int(x, default=0) -> int:
+    if type(x) is int:
+        return x
     try:
         return int(float(x))
     except Exception:
@@ -61,6 +158,41 @@ def get_stat_mapping(sport: str) -> dict:
         return BASKETBALL_STAT_TO_EVENT
     return SOCCER_STAT_TO_EVENT
 
+# Kolon bazlı stat store için sabit indeksler: stat adı -> kolon, sport -> kod
+STAT_KINDS = list(dict.fromkeys([*SOCCER_STAT_TO_EVENT, *BASKETBALL_STAT_TO_EVENT]))
+STAT_INDEX = {name: i for i, name in enumerate(STAT_KINDS)}
+SPORTS = ["Soccer", "Basketball"]
+SPORT_CODE = {name: i for i, name in enumerate(SPORTS)}
+# [sport kodu][stat kolonu] -> event tipi (o sporda event yoksa None)
+ETYPE_TABLE = [[get_stat_mapping(sp).get(k) for k in STAT_KINDS] for sp in SPORTS]
+STAT_MAPPED = np.array([[e is not None for e in row] for row in ETYPE_TABLE])
+# Futbolda büyük atak artışları iki event üretir
+STAT_REPEATS = np.array([k in ("dangerous_attack", "attack") for k in STAT_KINDS])
+
+def _norm_key(v: Any) -> str:
+    return re.sub(r"[^a-z0-9]", "", str(v).lower())
+
+# Animation feed'inde olay adı için bakılan alanlar ve ad -> event tipi eşlemesi.
+# Stat adları ve event tipleri normalize edilip (küçük harf, sadece alfanümerik)
+# doğrudan kabul edilir; feed'de görülen diğer yazımlar aşağıda.
+ANIM_TYPE_KEYS = ("type", "event", "event_type", "eventType", "action", "name", "code")
+ANIM_TEAM_KEYS = ("team", "side", "team_id", "teamId", "competitor")
+ANIM_EVENT_ALIASES = {
+    **{_norm_key(k): e for k, e in SOCCER_STAT_TO_EVENT.items()},
+    **{_norm_key(k): e for k, e in BASKETBALL_STAT_TO_EVENT.items()},
+    **{_norm_key(e): e for e in [*SOCCER_STAT_TO_EVENT.values(), *BASKETBALL_STAT_TO_EVENT.values()]},
+    "dangerousfreekick": "FREE_KICK_ZONE",
+    "safe": "SAFE_POSSESSION",
+    "possession": "SAFE_POSSESSION",
+    "throw": "THROW_IN",
+    "penaltykick": "PENALTY",
+    "threepointer": "THREE_POINT",
+    "3pt": "THREE_POINT",
+    "twopointer": "TWO_POINT",
+    "2pt": "TWO_POINT",
+}
+ANIM_TEAMS = {"1": 1, "2": 2, "home": 1, "away": 2, "team1": 1, "team2": 2, "h": 1, "a": 2}
+
 @dataclass
 class Game:
     game_id: str
@@ -69,12 +201,39 @@ class Game:
     tournament: str = "-"
     sport: str = "Soccer"
     sport_locked: bool = False  # Bir kere Basketball olduysa kilitlenir
+    region_id: str = ""
+    competition_id: str = ""
     is_live: int = 1
     current_game_time: str = ""
     score1: int = 0
     score2: int = 0
-    stats: Dict[str, Dict[str, int]] = field(default_factory=dict)
     last_update_ms: int = field(default_factory=now_ms)
+    version: int = 0  # Engine.version saati; görünür alan değişince artar
+
+    def visible_state(self) -> tuple:
+        return (self.team1, self.team2, self.tournament, self.sport, self.is_live,
+                self.current_game_time, self.score1, self.score2)
+
+    def to_match(self) -> dict:
+        return {
+            "game_id": self.game_id,
+            "title": f"{self.team1} vs {self.team2}",
+            "team1": self.team1,
+            "team2": self.team2,
+            "score1": self.score1,
+            "score2": self.score2,
+            "minute": self.current_game_time,
+            "sport": self.sport,
+            "tournament": self.tournament,
+            "is_live": self.is_live,
+            "last_update_ms": self.last_update_ms,
+        }
+
+# Checkpoint'te game başına satır (version hariç: yüklenince yeniden verilir)
+CHECKPOINT_FIELDS = ("game_id", "team1", "team2", "tournament", "sport", "sport_locked", "region_id",
+                     "competition_id", "is_live", "current_game_time", "score1", "score2", "last_update_ms")
+CHECKPOINT_MAGIC = b"MCK1"
+_CHECKPOINT_META_LEN = struct.Struct(">I")
 
 @dataclass
 class Event:
@@ -82,32 +241,102 @@ class Event:
     type: str
     team: Optional[int]
     ts: int
+    # Yayın sırasında atanır (Engine.publish_events); client resume için son gördüğünü bildirir
+    seq: int = 0
+
+@dataclass
+class GameUpdate:
+    """Bir swarm frame'inden çıkarılan, Engine state'inden bağımsız game verisi"""
+    game_id: str
+    sport_id: str = "1"
+    region_id: str = ""
+    competition_id: str = ""
+    team1: Optional[str] = None
+    team2: Optional[str] = None
+    tournament: Optional[str] = None
+    minute: str = ""
+    score: Optional[Tuple[int, int]] = None
+    is_live: Optional[int] = None
+    removed: bool = False  # swarm diff'inde game null geldi
+
+@dataclass
+class SwarmFrame:
+    """
+    Bir swarm frame'inin çıkarılmış hali. Stat'lar game başına dict yerine
+    frame boyunca kolon halinde: stat_update[i] hangi update'e ait,
+    stat_kind[i] STAT_KINDS indeksi, stat_values[i] = (team1, team2).
+    """
+    updates: List[GameUpdate]
+    stat_update: np.ndarray
+    stat_kind: np.ndarray
+    stat_values: np.ndarray
+
+@dataclass
+class AnimFrame:
+    """Tek game'in animation mesajından çıkan (event tipi, takım) listesi"""
+    game_id: str
+    events: List[Tuple[str, Optional[int]]]
+
+# (sport_id, region_id, competition_id, game_id, gobj); silinen game için gobj None
+GameRef = Tuple[str, str, str, str, Optional[dict]]
 
-def collect_games(node: Any, out: Dict[str, dict], sport_id: str = "1") -> None:
+def collect_games(data: Any) -> List[GameRef]:
     """
-    Game'leri toplarken sport_id'yi de taşı
-    sport -> 1: Soccer, 2: Basketball
+    Swarm verisindeki game'leri kopyalamadan topla.
+    Bilinen düzen sport -> region -> competition -> game seviye seviye
+    yürünür ve id'ler yol boyunca taşınır; başka şekiller için generic
+    walk'a düşülür (sport -> 1: Soccer, 2/3: Basketball).
     """
+    out: List[GameRef] = []
+    _walk_games(data, "1", out)
+    return out
+
+def _walk_games(node: Any, sport_id: str, out: List[GameRef]) -> None:
+    # Generic fallback: bilinmeyen yapı, dict/list değerler recursive gezilir
     if isinstance(node, dict):
         for k, v in node.items():
-            if k == "sport" and isinstance(v, dict):
-                # Sport seviyesindeyiz, her sport_id için recursive
-                for sid, sport_data in v.items():
-                    collect_games(sport_data, out, sport_id=str(sid))
-            elif k == "game" and isinstance(v, dict):
-                # Game seviyesine ulaştık
-                for gid, gobj in v.items():
-                    gid = str(gid).strip()
-                    if gid and isinstance(gobj, dict):
-                        # Game object'e sport_id'yi ekle
-                        gobj_with_sport = gobj.copy()
-                        gobj_with_sport["_sport_id"] = sport_id
-                        out[gid] = gobj_with_sport
-            else:
-                collect_games(v, out, sport_id)
+            if isinstance(v, (dict, list)):
+                _walk_item(k, v, sport_id, out)
     elif isinstance(node, list):
         for it in node:
-            collect_games(it, out, sport_id)
+            _walk_games(it, sport_id, out)
+
+def _walk_item(k: Any, v: Any, sport_id: str, out: List[GameRef]) -> None:
+    if k == "sport" and isinstance(v, dict):
+        _collect_sports(v, out)
+    elif k == "game" and isinstance(v, dict):
+        _collect_game_level(v, out, sport_id, "", "")
+    else:
+        _walk_games(v, sport_id, out)
+
+def _collect_sports(sports: dict, out: List[GameRef]) -> None:
+    for sid, sport_data in sports.items():
+        if isinstance(sport_data, dict):
+            _collect_level(sport_data, "region", _collect_regions, out, str(sid))
+
+def _collect_regions(regions: dict, out: List[GameRef], sid: str) -> None:
+    for rid, region in regions.items():
+        if isinstance(region, dict):
+            _collect_level(region, "competition", _collect_competitions, out, sid, str(rid))
+
+def _collect_competitions(comps: dict, out: List[GameRef], sid: str, rid: str) -> None:
+    for cid, comp in comps.items():
+        if isinstance(comp, dict):
+            _collect_level(comp, "game", _collect_game_level, out, sid, rid, str(cid))
+
+def _collect_level(obj: dict, child_key: str, child, out: List[GameRef], *ids: str) -> None:
+    """Beklenen alt seviyeyi hızlı yoldan, kalan dict/list değerleri generic yürü"""
+    for k, v in obj.items():
+        if k == child_key and isinstance(v, dict):
+            child(v, out, *ids)
+        elif isinstance(v, (dict, list)):
+            _walk_item(k, v, ids[0], out)
+
+def _collect_game_level(games: dict, out: List[GameRef], sid: str, rid: str, cid: str) -> None:
+    for gid, gobj in games.items():
+        gid = str(gid).strip()
+        if gid and (gobj is None or isinstance(gobj, dict)):
+            out.append((sid, rid, cid, gid, gobj))
 
 def detect_score_from_game_obj(gobj: dict) -> Optional[Tuple[int, int]]:
     info = gobj.get("info")
@@ -120,17 +349,20 @@ def detect_score_from_game_obj(gobj: dict) -> Optional[Tuple[int, int]]:
             return (safe_int(sc.get("1")), safe_int(sc.get("2")))
     return None
 
-def normalize_stats(gobj: dict) -> Dict[str, Dict[str, int]]:
-    res: Dict[str, Dict[str, int]] = {}
+def collect_stats(gobj: dict, idx: int, upd: List[int], kinds: List[int], vals: List[int]) -> None:
+    """Game'in bilinen stat'larını frame kolonlarına ekle"""
     stats = gobj.get("stats")
     if not isinstance(stats, dict):
-        return res
+        return
     for sname, sval in stats.items():
-        if not isinstance(sval, dict):
+        k = STAT_INDEX.get(sname)
+        if k is None or not isinstance(sval, dict):
             continue
         if "team1_value" in sval or "team2_value" in sval:
-            res[sname] = {"1": safe_int(sval.get("team1_value", 0)), "2": safe_int(sval.get("team2_value", 0))}
-    return res
+            upd.append(idx)
+            kinds.append(k)
+            vals.append(safe_int(sval.get("team1_value", 0)))
+            vals.append(safe_int(sval.get("team2_value", 0)))
 
 def extract_minute(gobj: dict) -> str:
     info = gobj.get("info")
@@ -138,6 +370,168 @@ def extract_minute(gobj: dict) -> str:
         return str(info.get("current_game_time"))
     return ""
 
+def team_name(gobj: dict, key: str) -> Optional[str]:
+    team_info = gobj.get(f"{key}_name") or gobj.get(key)
+    if isinstance(team_info, dict):
+        return team_info.get("name")
+    if isinstance(team_info, str) and team_info:
+        return team_info
+    return None
+
+def extract_update(ref: GameRef) -> GameUpdate:
+    """Tek bir swarm game objesinden state'ten bağımsız alanları çıkar"""
+    sport_id, region_id, competition_id, gid, gobj = ref
+    up = GameUpdate(game_id=gid, sport_id=sport_id, region_id=region_id, competition_id=competition_id)
+    if gobj is None:
+        up.removed = True
+        return up
+
+    if gobj.get("is_live") is not None:
+        up.is_live = 1 if safe_int(gobj.get("is_live")) else 0
+
+    # Takım isimlerini çek
+    up.team1 = team_name(gobj, "team1")
+    up.team2 = team_name(gobj, "team2")
+
+    # Info içinden de kontrol et
+    info = gobj.get("info")
+    if isinstance(info, dict):
+        if info.get("team1_name"):
+            up.team1 = str(info.get("team1_name"))
+        if info.get("team2_name"):
+            up.team2 = str(info.get("team2_name"))
+
+        # Tournament bilgisi
+        if info.get("league"):
+            league = info.get("league")
+            if isinstance(league, dict):
+                up.tournament = league.get("name")
+            elif isinstance(league, str):
+                up.tournament = league
+        elif info.get("tournament_name"):
+            up.tournament = str(info.get("tournament_name"))
+
+    up.minute = extract_minute(gobj)
+    up.score = detect_score_from_game_obj(gobj)
+    return up
+
+def extract_updates(swarm_obj: dict) -> Optional[SwarmFrame]:
+    data = swarm_obj.get("data")
+    if not isinstance(data, dict):
+        return None
+
+    updates: List[GameUpdate] = []
+    upd: List[int] = []
+    kinds: List[int] = []
+    vals: List[int] = []
+    # Aynı game frame'de iki kez geçebilir (farklı competition altında): eski dict
+    # davranışı gibi ilk konumda, son gelen obje geçerli; yoksa stat'lar iki kez diff'lenir
+    refs = {ref[3]: ref for ref in collect_games(data)}
+    for ref in refs.values():
+        if ref[4] is not None:
+            collect_stats(ref[4], len(updates), upd, kinds, vals)
+        updates.append(extract_update(ref))
+
+    if log.isEnabledFor(logging.DEBUG):
+        sport = data.get("sport")
+        sample = [(up.game_id, up.sport_id) for up in updates[:3]]
+        log.debug("[INGEST] sport keys=%s, collected %d games, sample=%s",
+                  list(sport.keys()) if isinstance(sport, dict) else [], len(updates), sample,
+                  extra=_RL_FRAME)
+
+    return SwarmFrame(
+        updates=updates,
+        stat_update=np.array(upd, dtype=np.intp),
+        stat_kind=np.array(kinds, dtype=np.intp),
+        stat_values=np.array(vals, dtype=np.int64).reshape(-1, 2),
+    )
+
+def _anim_event(d: dict) -> Optional[Tuple[str, Optional[int]]]:
+    for key in ANIM_TYPE_KEYS:
+        v = d.get(key)
+        if isinstance(v, (str, int)) and not isinstance(v, bool):
+            etype = ANIM_EVENT_ALIASES.get(_norm_key(v))
+            if etype:
+                break
+    else:
+        return None
+    team = None
+    for key in ANIM_TEAM_KEYS:
+        v = d.get(key)
+        if v is not None:
+            team = ANIM_TEAMS.get(_norm_key(v))
+            break
+    return etype, team
+
+def extract_anim_events(obj: Any, depth: int = 0) -> List[Tuple[str, Optional[int]]]:
+    """
+    animation_json_v2 mesajındaki olayları bul. Şema sabit değil: olay adı
+    ANIM_TYPE_KEYS'ten birinde olan dict'ler (iç içe, liste içinde de) kabul edilir.
+    """
+    out: List[Tuple[str, Optional[int]]] = []
+    if depth > 4:
+        return out
+    if isinstance(obj, dict):
+        ev = _anim_event(obj)
+        if ev is not None:
+            out.append(ev)
+            return out
+        items = obj.values()
+    elif isinstance(obj, list):
+        items = obj
+    else:
+        return out
+    for v in items:
+        if isinstance(v, (dict, list)):
+            out.extend(extract_anim_events(v, depth + 1))
+    return out
+
+def is_anim_frame(msg: Any) -> bool:
+    """Envelope'u çözmeden animation mesajı mı bak (collector'lar kind'i ilk yazar)"""
+    if isinstance(msg, str):
+        return msg.startswith('{"kind":"anim"')
+    return msg.startswith(b'{"kind":"anim"') or msg[1:11] == _ANIM_MSGPACK_KIND
+
+_ANIM_MSGPACK_KIND = wire.packb("kind") + wire.packb("anim")
+
+def decode_swarm(payload: Any) -> Optional[SwarmFrame]:
+    """Ham swarm frame'i (JSON bytes/str) tek seferde çöz; worker'da çalışabilir"""
+    swarm_obj = jloads_maybe(payload)
+    if not isinstance(swarm_obj, dict):
+        return None
+    return extract_updates(swarm_obj)
+
+def decode_anim(game_id: str, payload: Any) -> Optional[AnimFrame]:
+    events = extract_anim_events(jloads_maybe(payload))
+    return AnimFrame(game_id=game_id, events=events) if game_id and events else None
+
+def decode_ingest(msg: Any) -> Optional[Any]:
+    """
+    Eski (v1) /ingest envelope'unu çöz: swarm için SwarmFrame, animation için AnimFrame.
+    Saf fonksiyon: worker process/thread içinde çalışabilir.
+    """
+    # Binary frame: '{' ile başlıyorsa JSON bytes (codec.wrap_raw),
+    # değilse wire.SUBPROTOCOL ile gelen MessagePack envelope
+    if isinstance(msg, bytes) and msg[:1] != b"{":
+        obj = wire.unpackb(msg)
+    else:
+        obj = jloads_maybe(msg)
+    if not isinstance(obj, dict):
+        return None
+
+    if obj.get("kind") == "anim":
+        return decode_anim(str(obj.get("game_id") or ""), obj.get("payload"))
+    if obj.get("kind") == "swarm_recv":
+        return decode_swarm(obj.get("payload"))
+    if "code" in obj and "data" in obj:
+        return decode_swarm(obj)
+    return None
+
+def timed_decode(decode, *args) -> Tuple[Any, float]:
+    """decode'u çalıştır, süresini de döndür (havuzda ölçülür, metrik ana process'te)"""
+    start = time.perf_counter()
+    return decode(*args), time.perf_counter() - start
+
 def ws_path(ws) -> str:
     # websockets 10/11: ws.path
     p = getattr(ws, "path", None)
@@ -149,45 +543,301 @@ def ws_path(ws) -> str:
         return req.path
     return "/"
 
+MAX_MATCHES = 250
+
+def encode_front(msg: dict, binary: bool) -> Any:
+    """Frontend mesajı: binary client'a MessagePack (bytes), diğerlerine JSON (str)"""
+    if binary:
+        return wire.encode_front(msg)
+    return codec.dumps_text(msg)
+
+def events_msg(events: List[Event]) -> dict:
+    return {
+        "type": "events",
+        "events": [{"game_id": e.game_id, "etype": e.type, "team": e.team, "ts": e.ts, "seq": e.seq} for e in events],
+    }
+
+class StatsStore:
+    """
+    Tüm game'lerin stat değerleri tek bir (game x stat x takım) int64 dizisinde.
+    game_id -> satır indeksi; silinen game'lerin satırları yeniden kullanılır.
+    """
+
+    def __init__(self, capacity: int = 256):
+        self.values = np.zeros((capacity, len(STAT_KINDS), 2), dtype=np.int64)
+        self.row_of: Dict[str, int] = {}
+        self._free: List[int] = []
+
+    def row(self, gid: str) -> int:
+        r = self.row_of.get(gid)
+        if r is not None:
+            return r
+        if self._free:
+            r = self._free.pop()
+        else:
+            r = len(self.row_of)
+            if r >= len(self.values):
+                grown = np.zeros((len(self.values) * 2,) + self.values.shape[1:], dtype=np.int64)
+                grown[:len(self.values)] = self.values
+                self.values = grown
+        self.row_of[gid] = r
+        return r
+
+    def release(self, gid: str) -> None:
+        r = self.row_of.pop(gid, None)
+        if r is not None:
+            self.values[r] = 0
+            self._free.append(r)
+
+    def get(self, gid: str) -> Dict[str, Dict[str, int]]:
+        r = self.row_of.get(gid)
+        if r is None:
+            return {}
+        return {
+            name: {"1": int(v1), "2": int(v2)}
+            for name, (v1, v2) in zip(STAT_KINDS, self.values[r].tolist())
+            if v1 or v2
+        }
+
+    def apply(self, rows: np.ndarray, kinds: np.ndarray, new: np.ndarray, sports: np.ndarray):
+        """
+        Yeni değerleri toplu yaz; artışı olan ve sporunda eşlemesi olan
+        girişler için (giriş indeksi, takım, tekrar) dizilerini döndür.
+        """
+        prev = self.values[rows, kinds]
+        self.values[rows, kinds] = new
+        diff = new - prev
+        d1, d2 = diff[:, 0], diff[:, 1]
+        hit = np.nonzero(STAT_MAPPED[sports, kinds] & ((d1 > 0) | (d2 > 0)))[0]
+        d1, d2 = d1[hit], d2[hit]
+        team = np.where(d1 >= d2, 1, 2)
+        soccer = sports[hit] == SPORT_CODE["Soccer"]
+        repeat = np.where(soccer & STAT_REPEATS[kinds[hit]] & (d1 + d2 >= 3), 2, 1)
+        return hit, team, repeat
+
+class EventDeduper:
+    """
+    Aynı olay animation feed'inden (hızlı) ve stat diff'inden (yavaş) iki kez
+    gelebilir. ANIM_DEDUPE_MS içinde aynı (tip, takım) diğer kaynaktan zaten
+    geldiyse yenisi düşürülür. Sadece animation feed'i olan game'ler izlenir;
+    diğerlerinin stat event'leri olduğu gibi geçer.
+    """
+
+    def __init__(self):
+        # game_id -> (ts, etype, team, animation'dan mı)
+        self.recent: Dict[str, Deque[Tuple[int, str, Optional[int], bool]]] = {}
+
+    def _seen(self, q: Deque, e: Event, from_anim: bool) -> bool:
+        cutoff = e.ts - ANIM_DEDUPE_MS
+        while q and q[0][0] < cutoff:
+            q.popleft()
+        for i, (_, etype, team, src) in enumerate(q):
+            if src != from_anim and etype == e.type and team == e.team:
+                del q[i]
+                return True
+        q.append((e.ts, e.type, e.team, from_anim))
+        return False
+
+    def filter(self, events: List[Event], from_anim: bool) -> List[Event]:
+        if not from_anim and not self.recent:
+            return events
+        out = []
+        for e in events:
+            q = self.recent.get(e.game_id)
+            if q is None:
+                if not from_anim:
+                    out.append(e)
+                    continue
+                q = self.recent[e.game_id] = deque()
+            if not self._seen(q, e, from_anim):
+                out.append(e)
+        return out
+
+    def prune(self, ts: int) -> None:
+        cutoff = ts - ANIM_DEDUPE_MS
+        for gid in [gid for gid, q in self.recent.items() if not q or q[-1][0] < cutoff]:
+            del self.recent[gid]
+
+    def forget(self, gid: str) -> None:
+        self.recent.pop(gid, None)
+
+# Kuyrukta "gönderim anında güncel snapshot üret" işareti
+SNAPSHOT = object()
+
+class MatchChannel:
+    """
+    Bir sport filtresinin maç listesi yayını ("all", "Soccer", "Basketball").
+    Her kanalın kendi seq'i, son yayınlanan görünümü ve snapshot cache'i var.
+    """
+
+    def __init__(self, sport: str):
+        self.sport = sport
+        self.seq = 0
+        # Son yayınlanan görünüm: game_id -> version
+        self.view: Dict[str, int] = {}
+        self.clients: Set["FrontClient"] = set()
+        # Encode edilmiş snapshot (format -> veri); (state_epoch, seq) değişince geçersiz
+        self.snapshot_raw: Dict[bool, Any] = {}
+        self.snapshot_key: Tuple[int, int] = (-1, -1)
+
+class FrontClient:
+    """
+    Tek bir /frontend bağlantısı: sınırlı giden kuyruk + kendi writer task'ı.
+    Broadcast sadece kuyruğa ekler, yavaş client ingest'i bekletmez.
+    """
+
+    def __init__(self, ws, engine: "Engine"):
+        self.ws = ws
+        self.engine = engine
+        # Abonelik: hangi maç listesi kanalı ve hangi game'lerin event'leri.
+        # subscribe gelene kadar eski davranış: "all" listesi + tüm event'ler
+        self.channel: Optional[MatchChannel] = None
+        self.games: Set[str] = set()
+        self.all_events = True
+        # Subprotocol ile binary (MessagePack) istendiyse True, yoksa JSON text
+        self.binary = ws.subprotocol == wire.SUBPROTOCOL
+        # (mesaj, kuyruğa girdiği an): send lag metriği için
+        self.queue: Deque[Tuple[Any, float]] = deque()
+        self.wakeup = asyncio.Event()
+        self.closed = False
+        self.dropped = 0
+        self.overflow = FRONT_OVERFLOW
+        self.task = asyncio.create_task(self._writer())
+
+    def enqueue(self, raw: Any) -> None:
+        if self.closed:
+            return
+        if len(self.queue) >= FRONT_QUEUE_MAX:
+            if self.overflow == "disconnect":
+                log.warning("[FRONT] slow client disconnected (queue=%d)", len(self.queue), extra=_RL_FRONT)
+                self.close(code=1013, reason="slow consumer")
+                return
+            if self.overflow == "drop_oldest":
+                self.queue.popleft()
+                self.dropped += 1
+                FRONT_DROPPED.inc()
+            else:
+                self.dropped += len(self.queue)
+                FRONT_DROPPED.inc(len(self.queue))
+                self.queue.clear()
+                if raw is not SNAPSHOT:
+                    self.queue.append((SNAPSHOT, time.monotonic()))
+        self.queue.append((raw, time.monotonic()))
+        self.wakeup.set()
+
+    def lag(self, now: float) -> float:
+        """Kuyruktaki en eski mesajın bekleme süresi (saniye)"""
+        return now - self.queue[0][1] if self.queue else 0.0
+
+    def snapshot(self) -> Any:
+        """Gönderim anında güncel snapshot (encode edilmiş); kanal yoksa None"""
+        if self.channel is None:
+            return None
+        return self.engine.snapshot_raw(self.channel, self.binary)
+
+    def close(self, code: int = 1000, reason: str = "") -> None:
+        if self.closed:
+            return
+        self.closed = True
+        self.queue.clear()
+        self.task.cancel()
+        self.engine.remove_client(self)
+        asyncio.ensure_future(self.ws.close(code=code, reason=reason))
+
+    async def _writer(self):
+        try:
+            while True:
+                while not self.queue:
+                    self.wakeup.clear()
+                    await self.wakeup.wait()
+                item, queued = self.queue.popleft()
+                FRONT_SEND_LAG.observe(time.monotonic() - queued)
+                if item is SNAPSHOT:
+                    item = self.snapshot()
+                    if item is None:
+                        continue
+                await self.ws.send(item)
+        except asyncio.CancelledError:
+            pass
+        except Exception:
+            # bağlantı koptu
+            self.closed = True
+            self.engine.remove_client(self)
+
 class Engine:
     def __init__(self):
-        self.games: Dict[str, Game] = {}
-        self.front_clients: List[Any] = []
+        # Recency index: en son güncellenen game en sonda (move_to_end)
+        self.games: "OrderedDict[str, Game]" = OrderedDict()
+        self.front_clients: Set[FrontClient] = set()
+        # Delta protokolü: her değişiklik global saati ilerletir,
+        # her kanal kendi yayınladığı görünümü game_id -> version olarak tutar
+        self.version = 0
+        self.channels: Dict[str, MatchChannel] = {s: MatchChannel(s) for s in ["all"] + SPORTS}
+        # Liste sırası/içeriği her değiştiğinde artar; snapshot cache anahtarı
+        self.state_epoch = 0
+        # Event yönlendirme: game_id -> abone client'lar, abonesizler her şeyi alır
+        self.game_subs: Dict[str, Set[FrontClient]] = {}
+        self.event_all: Set[FrontClient] = set()
+        # FRONT_WORKERS modunda frontend worker bağlantıları (bkz. WorkerLink)
+        self.links: Set["WorkerLink"] = set()
+        # Tick arası biriken event'ler ve client başına hazır (encode edilmiş) mesajlar
+        self.pending_events: List[Event] = []
+        # Abonelerine hemen gitmiş animation event'leri: tüm-event client'ları/worker'lar tick'te alır
+        self.pending_all: List[Event] = []
+        # Event replay: game başına son event'ler ve halkadan düşen en büyük seq
+        self.event_seq = self.replay_base = now_ms() * 1000
+        self.event_log: Dict[str, Deque[Event]] = {}
+        self.replay_floor: Dict[str, int] = {}
+        self._outbox: Dict[FrontClient, List[str]] = {}
+        self._published_epoch = -1
+        self.not_live: Set[str] = set()
+        self.stats = StatsStore()
+        self.deduper = EventDeduper()
 
     def upsert_game(self, gid: str) -> Game:
         if gid not in self.games:
             self.games[gid] = Game(game_id=gid)
+            self.stats.row(gid)
         return self.games[gid]
 
-    def apply_swarm_payload(self, swarm_obj: dict) -> List[Event]:
-        events: List[Event] = []
-        data = swarm_obj.get("data")
-        if not isinstance(data, dict):
-            return events
+    def touch(self, g: Game, ts: int) -> None:
+        g.last_update_ms = ts
+        self.games.move_to_end(g.game_id)
+        self.state_epoch += 1
+
+    def mark_changed(self, g: Game) -> None:
+        self.version += 1
+        g.version = self.version
+        self.state_epoch += 1
 
-        # DEBUG: Data yapısını logla
-        if "sport" in data:
-            sport_keys = list(data["sport"].keys()) if isinstance(data.get("sport"), dict) else []
-            print(f"[DEBUG] Data has sport keys: {sport_keys}")
-
-        extracted: Dict[str, dict] = {}
-        collect_games(data, extracted)
-        
-        print(f"[DEBUG] Collected {len(extracted)} games from swarm data")
-        
-        # İlk birkaç game'in sport_id'sini logla
-        for gid in list(extracted.keys())[:3]:
-            sid = extracted[gid].get("_sport_id", "NOT SET")
-            print(f"[DEBUG] Sample game {gid} has _sport_id={sid}")
+    def apply_swarm_payload(self, swarm_obj: dict) -> List[Event]:
+        frame = extract_updates(swarm_obj)
+        return self.apply_frame(frame) if frame else []
 
+    def apply_frame(self, frame: SwarmFrame) -> List[Event]:
+        """extract_updates çıktısını sırayla state'e uygula (event loop üzerinde)"""
+        updates = frame.updates
         ts = now_ms()
-        for gid, gobj in extracted.items():
+        # Stat kolonları için update başına satır ve sport kodu
+        rows = np.zeros(len(updates), dtype=np.intp)
+        sports = np.zeros(len(updates), dtype=np.intp)
+        for i, up in enumerate(updates):
+            gid = up.game_id
+            if up.removed:
+                # Swarm game'i listeden çıkardı: bitmiş say, sweeper temizler
+                g = self.games.get(gid)
+                if g is not None and g.is_live:
+                    g.is_live = 0
+                    self.not_live.add(gid)
+                    self.mark_changed(g)
+                continue
+
             g = self.upsert_game(gid)
-            g.last_update_ms = ts
+            self.touch(g, ts)
+            before = g.visible_state()
 
-            # Sport türünü game object'ten al (_sport_id)
-            sport_id = gobj.get("_sport_id", "1")
-            print(f"[DEBUG] Game {gid} has _sport_id: {sport_id}")
+            sport_id = up.sport_id
+            log.debug("[GAME] %s has _sport_id: %s", gid, sport_id, extra=_RL_GAME)
             
             # Sport kilitli değilse güncelle
             if not g.sport_locked:
@@ -196,122 +846,872 @@ class Engine:
                 if sport_id in ("2", "3"):  # 2 veya 3 basketbol olabilir
                     g.sport = "Basketball"
                     g.sport_locked = True  # Basketball'a kilitle - artık değişmesin
-                    print(f"[SPORT] 🏀 Game {gid} -> Basketball (sport_id={sport_id}) LOCKED")
+                    log.info("[SPORT] 🏀 Game %s -> Basketball (sport_id=%s) LOCKED", gid, sport_id)
                 else:
                     g.sport = "Soccer"
-                    print(f"[SPORT] ⚽ Game {gid} -> Soccer (sport_id={sport_id})")
+                    log.debug("[SPORT] ⚽ Game %s -> Soccer (sport_id=%s)", gid, sport_id, extra=_RL_SPORT)
             else:
-                print(f"[SPORT] 🔒 Game {gid} sport locked as {g.sport} (ignoring sport_id={sport_id})")
-
-            # Takım isimlerini çek
-            team_info = gobj.get("team1_name") or gobj.get("team1")
-            if team_info:
-                if isinstance(team_info, dict):
-                    g.team1 = team_info.get("name", g.team1)
-                elif isinstance(team_info, str):
-                    g.team1 = team_info
-            
-            team_info = gobj.get("team2_name") or gobj.get("team2")
-            if team_info:
-                if isinstance(team_info, dict):
-                    g.team2 = team_info.get("name", g.team2)
-                elif isinstance(team_info, str):
-                    g.team2 = team_info
-            
-            # Info içinden de kontrol et
-            info = gobj.get("info")
-            if isinstance(info, dict):
-                if info.get("team1_name"):
-                    g.team1 = str(info.get("team1_name"))
-                if info.get("team2_name"):
-                    g.team2 = str(info.get("team2_name"))
-                
-                # Tournament bilgisi
-                if info.get("league"):
-                    league = info.get("league")
-                    if isinstance(league, dict):
-                        g.tournament = league.get("name", g.tournament)
-                    elif isinstance(league, str):
-                        g.tournament = league
-                elif info.get("tournament_name"):
-                    g.tournament = str(info.get("tournament_name"))
-
-            minute = extract_minute(gobj)
-            if minute:
-                g.current_game_time = minute
-
-            sc = detect_score_from_game_obj(gobj)
-            if sc:
-                g.score1, g.score2 = sc
-
-            new_stats = normalize_stats(gobj)
-            if new_stats:
-                # Sport türüne göre event mapping seç
-                stat_mapping = get_stat_mapping(g.sport)
-                
-                for sname, tvals in new_stats.items():
-                    if sname not in stat_mapping:
-                        continue
-                    prev = g.stats.get(sname, {"1": 0, "2": 0})
-                    n1, n2 = tvals.get("1", 0), tvals.get("2", 0)
-                    p1, p2 = prev.get("1", 0), prev.get("2", 0)
-                    d1, d2 = n1 - p1, n2 - p2
-                    if d1 > 0 or d2 > 0:
-                        team = 1 if d1 >= d2 else 2
-                        etype = stat_mapping[sname]
-                        # Futbol için özel tekrar mantığı
-                        repeat = 2 if g.sport == "Soccer" and sname in ("dangerous_attack", "attack") and (d1 + d2) >= 3 else 1
-                        for _ in range(repeat):
-                            events.append(Event(game_id=gid, type=etype, team=team, ts=ts))
-
-                g.stats.update(new_stats)
+                log.debug("[SPORT] 🔒 Game %s sport locked as %s (ignoring sport_id=%s)", gid, g.sport, sport_id,
+                          extra=_RL_SPORT)
 
+            if up.region_id:
+                g.region_id = up.region_id
+                g.competition_id = up.competition_id
+            if up.team1:
+                g.team1 = up.team1
+            if up.team2:
+                g.team2 = up.team2
+            if up.tournament:
+                g.tournament = up.tournament
+            if up.minute:
+                g.current_game_time = up.minute
+            if up.score:
+                g.score1, g.score2 = up.score
+            if up.is_live is not None:
+                g.is_live = up.is_live
+                if up.is_live:
+                    self.not_live.discard(gid)
+                else:
+                    self.not_live.add(gid)
+
+            if g.visible_state() != before:
+                self.mark_changed(g)
+
+            rows[i] = self.stats.row(gid)
+            sports[i] = SPORT_CODE[g.sport]
+
+        return self.deduper.filter(self._stat_events(frame, rows, sports, ts), from_anim=False)
+
+    def apply_anim(self, frame: AnimFrame) -> List[Event]:
+        """Animation feed'inden gelen olaylar; stat diff'iyle aynı olanlar tekrar gitmez"""
+        ts = now_ms()
+        events = [Event(game_id=frame.game_id, type=etype, team=team, ts=ts) for etype, team in frame.events]
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("[ANIM] %s: %s", frame.game_id, [e.type for e in events], extra=_RL_FRAME)
+        return self.deduper.filter(events, from_anim=True)
+
+    def _stat_events(self, frame: SwarmFrame, rows: np.ndarray, sports: np.ndarray, ts: int) -> List[Event]:
+        """Frame'in tüm stat'larını tek vektörel geçişte yaz ve artışlardan event üret"""
+        events: List[Event] = []
+        if not len(frame.stat_kind):
+            return events
+        owner = frame.stat_update
+        kinds = frame.stat_kind
+        entry_sports = sports[owner]
+        hit, team, repeat = self.stats.apply(rows[owner], kinds, frame.stat_values, entry_sports)
+        for i, t, rep in zip(hit.tolist(), team.tolist(), repeat.tolist()):
+            gid = frame.updates[owner[i]].game_id
+            etype = ETYPE_TABLE[entry_sports[i]][kinds[i]]
+            for _ in range(rep):
+                events.append(Event(game_id=gid, type=etype, team=t, ts=ts))
         return events
 
-    def snapshot_matches(self) -> List[dict]:
-        items = sorted(self.games.values(), key=lambda x: x.last_update_ms, reverse=True)
-        res = []
-        for g in items[:250]:
-            # Sport field doğru gönderilsin
-            actual_sport = g.sport if hasattr(g, 'sport') else "Soccer"
-            print(f"[SNAPSHOT] Game {g.game_id} sending as {actual_sport}")
-            res.append({
-                "game_id": g.game_id,
-                "title": f"{g.team1} vs {g.team2}",
-                "team1": g.team1,
-                "team2": g.team2,
-                "score1": g.score1,
-                "score2": g.score2,
-                "minute": g.current_game_time,
-                "sport": actual_sport,
-                "tournament": g.tournament,
-                "is_live": g.is_live,
-                "last_update_ms": g.last_update_ms,
-            })
+    def sweep(self, ts: int) -> List[dict]:
+        """
+        TTL'i dolan (en eski uçtan) ve is_live=0 olan game'leri sil.
+        games recency sırasında olduğu için maliyet silinen sayısı kadar.
+        """
+        evicted: List[dict] = []
+        cutoff = ts - int(GAME_TTL_S * 1000)
+        while self.games:
+            g = next(iter(self.games.values()))
+            if g.last_update_ms > cutoff:
+                break
+            evicted.append(self.evict(g.game_id))
+        for gid in list(self.not_live):
+            if gid in self.games:
+                evicted.append(self.evict(gid))
+        self.not_live.clear()
+        self.deduper.prune(ts)
+        return evicted
+
+    def evict(self, gid: str) -> dict:
+        """Game'i sil, arşivlenecek son halini döndür"""
+        g = self.games.pop(gid)
+        record = asdict(g)
+        record["stats"] = self.stats.get(gid)
+        self.stats.release(gid)
+        self.deduper.forget(gid)
+        self.event_log.pop(gid, None)
+        self.replay_floor.pop(gid, None)
+        self.not_live.discard(gid)
+        self.state_epoch += 1
+        return record
+
+    def checkpoint(self) -> dict:
+        """
+        Game'lerin recency sırasında kopyası (satırlar CHECKPOINT_FIELDS sırasında,
+        stat'lar game x stat x takım dizisi). Event loop'ta alınır, encode/yazma thread'de.
+        """
+        rows = [self.stats.row_of[gid] for gid in self.games]
+        return {
+            "saved_ms": now_ms(),
+            "fields": CHECKPOINT_FIELDS,
+            "stat_kinds": STAT_KINDS,
+            "games": [[getattr(g, f) for f in CHECKPOINT_FIELDS] for g in self.games.values()],
+            "stats": self.stats.values[rows],
+        }
+
+    def restore(self, state: dict) -> int:
+        """Checkpoint'i boş engine'e yükle; TTL'i geçmiş ve bitmiş game'ler atlanır"""
+        fields = tuple(state["fields"])
+        stats = state["stats"]
+        cutoff = now_ms() - int(GAME_TTL_S * 1000)
+        # Alanlar aynı sıradaysa satır doğrudan Game(*row); değilse isimle eşlenir
+        same = fields == CHECKPOINT_FIELDS
+        known = set(CHECKPOINT_FIELDS)
+        ts_col, live_col = fields.index("last_update_ms"), fields.index("is_live")
+        dst_rows: List[int] = []
+        src_rows: List[int] = []
+        for i, row in enumerate(state["games"]):
+            if row[ts_col] <= cutoff or not row[live_col]:
+                continue
+            g = Game(*row) if same else Game(**{f: v for f, v in zip(fields, row) if f in known})
+            self.games[g.game_id] = g
+            self.mark_changed(g)
+            dst_rows.append(self.stats.row(g.game_id))
+            src_rows.append(i)
+        if dst_rows:
+            if state["stat_kinds"] == STAT_KINDS:
+                self.stats.values[dst_rows] = stats[src_rows]
+            else:
+                # STAT_KINDS değişmiş: kolonlar isimle eşlenir
+                cols = [(STAT_INDEX[k], j) for j, k in enumerate(state["stat_kinds"]) if k in STAT_INDEX]
+                if cols:
+                    dst_cols, src_cols = zip(*cols)
+                    self.stats.values[np.ix_(dst_rows, dst_cols)] = stats[np.ix_(src_rows, src_cols)]
+        self.state_epoch += 1
+        return len(dst_rows)
+
+    def add_client(self, client: FrontClient) -> None:
+        self.front_clients.add(client)
+        client.channel = self.channels["all"]
+        client.channel.clients.add(client)
+        self.event_all.add(client)
+
+    def remove_client(self, client: FrontClient) -> None:
+        self.front_clients.discard(client)
+        self.links.discard(client)
+        for channel in self.channels.values():
+            channel.clients.discard(client)
+        self._unroute_events(client)
+
+    def add_link(self, link: "WorkerLink") -> None:
+        """Worker tüm kanalları ve tüm event'leri alır; yönlendirmeyi kendisi yapar"""
+        self.front_clients.add(link)
+        self.links.add(link)
+        for channel in self.channels.values():
+            channel.clients.add(link)
+        self.event_all.add(link)
+
+    def watched_games(self) -> Set[str]:
+        """Event aboneliği olan game'ler (bu process'in client'ları + worker'lar)"""
+        return set(self.game_subs).union(*(link.watched for link in self.links))
+
+    def _unroute_events(self, client: FrontClient) -> None:
+        self.event_all.discard(client)
+        for gid in client.games:
+            subs = self.game_subs.get(gid)
+            if subs is not None:
+                subs.discard(client)
+                if not subs:
+                    del self.game_subs[gid]
+        client.games = set()
+
+    def subscribe(self, client: FrontClient, games: List[str], sport: str, list_only: bool) -> None:
+        """
+        Client'ın aboneliğini değiştir: event'ler sadece `games` için gelir
+        (list_only ise hiç gelmez), maç listesi `sport` kanalından gelir.
+        Kanal değiştiyse yeni kanalın snapshot'ı kuyruğa eklenir.
+        """
+        self._unroute_events(client)
+        client.all_events = False
+        if not list_only:
+            client.games = set(games[:MAX_MATCHES])
+            for gid in client.games:
+                self.game_subs.setdefault(gid, set()).add(client)
+
+        channel = self.channels.get(sport, self.channels["all"])
+        if channel is not client.channel:
+            if client.channel is not None:
+                client.channel.clients.discard(client)
+            client.channel = channel
+            channel.clients.add(client)
+            client.enqueue(SNAPSHOT)
+
+    def top_games(self, sport: str = "all") -> List[Game]:
+        # games zaten recency sırasında; sıralama yok, sadece ilk MAX_MATCHES
+        recent = reversed(self.games.values())
+        if sport != "all":
+            recent = (g for g in recent if g.sport == sport)
+        return list(islice(recent, MAX_MATCHES))
+
+    def snapshot_matches(self, channel: MatchChannel) -> List[dict]:
+        res = [g.to_match() for g in self.top_games(channel.sport)]
+        log.debug("[SNAPSHOT] built with %d games (%s)", len(res), channel.sport, extra=_RL_FRAME)
         return res
 
-    async def broadcast_front(self, msg: dict):
+    def snapshot_msg(self, channel: MatchChannel) -> dict:
+        return {"type": "matches", "channel": channel.sport, "seq": channel.seq,
+                "matches": self.snapshot_matches(channel)}
+
+    def matches_delta(self, channel: MatchChannel) -> Optional[dict]:
+        """
+        Kanalın son yayınından beri eklenen/değişen/çıkan maçları döndür.
+        Liste sırası (recency) değiştiyse "order" game_id'leri server sırasıyla taşır:
+        sadece sırası değişen maçın satırı tekrar gönderilmez.
+        Değişiklik yoksa None; varsa kanalın seq'i bir artar.
+        """
+        view: Dict[str, int] = {}
+        upserts = []
+        for g in self.top_games(channel.sport):
+            view[g.game_id] = g.version
+            if channel.view.get(g.game_id) != g.version:
+                upserts.append(g.to_match())
+        removed = [gid for gid in channel.view if gid not in view]
+        reordered = list(view) != list(channel.view)
+        channel.view = view
+        if not upserts and not removed and not reordered:
+            return None
+        channel.seq += 1
+        msg = {"type": "matches_delta", "channel": channel.sport, "seq": channel.seq,
+               "upserts": upserts, "removed": removed}
+        if reordered:
+            msg["order"] = list(view)
+        return msg
+
+    def snapshot_raw(self, channel: MatchChannel, binary: bool = False) -> Any:
+        key = (self.state_epoch, channel.seq)
+        if channel.snapshot_key != key:
+            channel.snapshot_raw = {}
+            channel.snapshot_key = key
+        raw = channel.snapshot_raw.get(binary)
+        if raw is None:
+            with SNAPSHOT_TIME.time():
+                raw = encode_front(self.snapshot_msg(channel), binary)
+            channel.snapshot_raw[binary] = raw
+        return raw
+
+    def add_events(self, events: List[Event]) -> None:
+        if not events:
+            return
+        if BROADCAST_EVENTS_IMMEDIATE:
+            self.publish_now(events)
+        else:
+            self.pending_events.extend(events)
+
+    def publish(self) -> None:
+        """Biriken event'leri ve değişen maçları yayınla (tick başına bir kez)"""
+        with BROADCAST_TIME.time():
+            if self.pending_all:
+                events, self.pending_all = self.pending_all, []
+                if self.event_all:
+                    self.send_to(self.event_all, events_msg(events))
+            if self.pending_events:
+                events, self.pending_events = self.pending_events, []
+                self.publish_events(events)
+            if self.state_epoch != self._published_epoch:
+                self._published_epoch = self.state_epoch
+                self.publish_matches()
+            self.flush()
+
+    def publish_now(self, events: List[Event]) -> None:
+        """Tick'i beklemeden yayınla (animation event'leri, BROADCAST_EVENTS_IMMEDIATE)"""
+        with BROADCAST_TIME.time():
+            self.publish_events(events)
+            self.flush()
+
+    def publish_anim(self, events: List[Event]) -> None:
+        """
+        Animation event'leri: game'e abone client'lara tick'i beklemeden, tüm-event
+        client'larına ve worker linklerine bir sonraki tick'te (frame sınırı korunur).
+        BROADCAST_EVENTS_IMMEDIATE ya da tick yoksa herkese hemen.
+        """
+        if not events:
+            return
+        if BROADCAST_EVENTS_IMMEDIATE or BROADCAST_TICK_MS <= 0:
+            self.publish_now(events)
+            return
+        with BROADCAST_TIME.time():
+            self.record_events(events)
+            self.pending_all.extend(events)
+            if self.game_subs:
+                self.send_by_game(events)
+                self.flush()
+
+    def publish_matches(self) -> None:
+        """Dinleyicisi olan her kanal için delta üret ve sadece o kanala gönder"""
+        for channel in self.channels.values():
+            if not channel.clients:
+                continue
+            delta = self.matches_delta(channel)
+            if delta:
+                self.send_to(channel.clients, delta)
+
+    def record_events(self, events: List[Event]) -> None:
+        """Seq ata (core'dan gelenler zaten taşır) ve game halkalarına ekle"""
+        for e in events:
+            if e.seq:
+                self.event_seq = max(self.event_seq, e.seq)
+            else:
+                # Seq'i burada alan event bu process'te üretildi (worker'daki kopyalar sayılmaz)
+                self.event_seq += 1
+                e.seq = self.event_seq
+                g = self.games.get(e.game_id)
+                EVENTS.inc(labels=(e.type, g.sport if g else ""))
+            ring = self.event_log.get(e.game_id)
+            if ring is None:
+                ring = self.event_log[e.game_id] = deque(maxlen=EVENT_REPLAY_PER_GAME)
+            elif len(ring) == ring.maxlen:
+                self.replay_floor[e.game_id] = ring[0].seq
+            ring.append(e)
+
+    def replay(self, client: FrontClient, last_seq: int) -> None:
+        """
+        Client'ın abone olduğu game'lerde last_seq'ten sonraki event'leri sadece ona gönder.
+        Halkalar aradaki boşluğu kapsamıyorsa elde kalanların hepsi "reset" ile gider.
+        """
+        games = self.event_log.keys() if client.all_events else client.games
+        covered = last_seq >= self.replay_base and all(
+            self.replay_floor.get(gid, 0) <= last_seq for gid in games)
+        since = last_seq if covered else 0
+        events = sorted((e for gid in games for e in self.event_log.get(gid, ()) if e.seq > since),
+                        key=lambda e: e.seq)
+        if covered and not events:
+            return
+        msg = dict(events_msg(events), replay=True, reset=not covered)
+        client.enqueue(encode_front(msg, client.binary))
+
+    def publish_events(self, events: List[Event]) -> None:
+        """Event'leri abonesiz client'lara toptan, abonelere game bazında gönder"""
+        if not events:
+            return
+        self.record_events(events)
+        if not self.front_clients:
+            return
+        if self.event_all:
+            self.send_to(self.event_all, events_msg(events))
+        self.send_by_game(events)
+
+    def send_by_game(self, events: List[Event]) -> None:
+        """Event'leri game'e abone client'lara game bazında gönder"""
+        if not self.game_subs:
+            return
+        by_game: Dict[str, List[Event]] = {}
+        for e in events:
+            if e.game_id in self.game_subs:
+                by_game.setdefault(e.game_id, []).append(e)
+        for gid, evs in by_game.items():
+            self.send_to(self.game_subs[gid], events_msg(evs))
+
+    def send_to(self, clients: Set[FrontClient], msg: dict) -> None:
+        """Mesajı format başına bir kere encode et, flush'a kadar client'ların outbox'ına ekle"""
+        encoded: Dict[bool, Any] = {}
+        outbox = self._outbox
+        for client in clients:
+            raw = encoded.get(client.binary)
+            if raw is None:
+                raw = encoded[client.binary] = encode_front(msg, client.binary)
+            parts = outbox.get(client)
+            if parts is None:
+                outbox[client] = [raw]
+            else:
+                parts.append(raw)
+
+    def flush(self) -> None:
+        """Outbox'ı client başına tek frame olarak kuyruğa ekle"""
+        outbox, self._outbox = self._outbox, {}
+        for client, parts in outbox.items():
+            if len(parts) == 1:
+                client.enqueue(parts[0])
+            elif client.binary:
+                client.enqueue(wire.pack_batch(parts))
+            else:
+                # Parçalar zaten encode edilmiş; tekrar dumps etmeden birleştir
+                client.enqueue('{"type":"batch","messages":[' + ",".join(parts) + "]}")
+
+    def broadcast_front(self, msg: dict):
+        """Mesajı bir kere encode et, her client'ın kuyruğuna ekle (O(enqueue))"""
         if not self.front_clients:
             return
-        raw = json.dumps(msg, ensure_ascii=False)
-        dead = []
-        for ws in self.front_clients:
+        self.send_to(self.front_clients, msg)
+        self.flush()
+
+class WorkerLink(FrontClient):
+    """
+    Core tarafında bir frontend worker bağlantısı. Engine için tüm kanallara ve
+    tüm event'lere abone bir JSON client gibidir; snapshot'ı tüm kanalları kapsar.
+    """
+
+    def __init__(self, ws, engine: "Engine"):
+        super().__init__(ws, engine)
+        self.binary = False
+        # Worker'ın aynası delta'ları sırayla uygular: mesaj atmak sessiz kayma demek,
+        # FRONT_OVERFLOW ne olursa olsun taşmada kuyruk tek bir tam snapshot'a iner
+        self.overflow = "coalesce"
+        # Worker'ın client'larının izlediği game'ler (collector önceliği için)
+        self.watched: Set[str] = set()
+        # Worker'ın son gönderdiği kendi metrik aileleri (diğer worker'lara aktarılır)
+        self.metrics: List[metrics.Family] = []
+
+    def snapshot(self) -> Any:
+        parts = [codec.dumps_text({"type": "replay_base", "seq": self.engine.event_seq})]
+        parts += [self.engine.snapshot_raw(channel, False) for channel in self.engine.channels.values()]
+        return '{"type":"batch","messages":[' + ",".join(parts) + "]}"
+
+class MirrorEngine(Engine):
+    """
+    Frontend worker'ın Engine'i: maç listesi core'dan gelen snapshot/delta'larla
+    kanal başına aynalanır; abonelik, event yönlendirme ve encode worker'da yapılır.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.mirror: Dict[str, Dict[str, dict]] = {name: {} for name in self.channels}
+        # Core'un son gönderdiği metrik aileleri: core + diğer worker'lar
+        # (/metrics'te bu worker'ınkilerle birleşir)
+        self.core_metrics: List[metrics.Family] = []
+        # Delta seq boşluğu görüldü: core_link core'dan snapshot ister (resync_sent),
+        # snapshot gelene kadar delta'lar uygulanmaz
+        self.resync_pending = False
+        self.resync_sent = False
+
+    def snapshot_matches(self, channel: MatchChannel) -> List[dict]:
+        return list(self.mirror[channel.sport].values())
+
+    def apply_core(self, msg: Any) -> None:
+        """Core'dan gelen bir mesajı uygula; flush çağıran tarafta"""
+        if not isinstance(msg, dict):
+            return
+        mtype = msg.get("type")
+        if mtype == "batch":
+            for m in msg.get("messages") or []:
+                self.apply_core(m)
+        elif mtype == "events":
+            self.publish_events([Event(game_id=e["game_id"], type=e["etype"], team=e["team"], ts=e["ts"], seq=e["seq"])
+                                 for e in msg.get("events") or []])
+        elif mtype == "metrics":
+            self.core_metrics = msg.get("families") or []
+        elif mtype == "replay_base":
+            # Link (yeniden) kuruldu: bundan önceki event'ler bu worker'da yok
+            self.event_seq = self.replay_base = msg["seq"]
+            self.event_log.clear()
+            self.replay_floor.clear()
+        elif mtype in ("matches", "matches_delta"):
+            channel = self.channels.get(msg.get("channel"))
+            if channel is None:
+                return
+            rows = self.mirror[channel.sport]
+            seq = safe_int(msg.get("seq"))
+            if mtype == "matches_delta" and (self.resync_pending or seq != channel.seq + 1):
+                if not self.resync_pending:
+                    log.warning("[WORKER] %s delta gap: %d -> %d, requesting snapshot", channel.sport,
+                                channel.seq, seq, extra=_RL_FRONT)
+                    self.resync_pending = True
+                    self.resync_sent = False
+                return
+            channel.seq = seq
+            self.state_epoch += 1
+            if mtype == "matches":
+                # Core'a (yeniden) bağlanıldı ya da link taştı: client'lar baştan alır.
+                # Core'un snapshot'ı tüm kanalları birlikte taşır
+                self.resync_pending = False
+                rows.clear()
+                rows.update((m["game_id"], m) for m in msg.get("matches") or [])
+                for client in channel.clients:
+                    client.enqueue(SNAPSHOT)
+                return
+            for m in msg.get("upserts") or []:
+                rows[m["game_id"]] = m
+            for gid in msg.get("removed") or []:
+                rows.pop(gid, None)
+            if msg.get("order"):
+                self.mirror[channel.sport] = {gid: rows[gid] for gid in msg["order"] if gid in rows}
+            self.send_to(channel.clients, msg)
+
+engine = Engine()
+ingest_pool: Optional[Executor] = None
+# INGEST_LOG_DIR verilirse gelen her ingest mesajı kaydedilir (replay.py ile tekrar oynatılır)
+ingest_log: Optional[ingestlog.IngestLogWriter] = None
+_ingest_conns = count(1)
+# /metrics örneklerine eklenen process label'ı (worker modunda "core" / "worker-N")
+metrics_labels: Dict[str, str] = {"process": "core"} if FRONT_WORKERS > 0 else {}
+
+def _front_viewers() -> List[FrontClient]:
+    return [c for c in engine.front_clients if c not in engine.links]
+
+def _max_lag() -> float:
+    now = time.monotonic()
+    return max((c.lag(now) for c in engine.front_clients), default=0.0)
+
+metrics.Gauge("masis_games", "Takip edilen game sayısı", lambda: len(engine.games))
+metrics.Gauge("masis_front_clients", "Bağlı frontend client sayısı", lambda: len(_front_viewers()))
+metrics.Gauge("masis_front_workers", "Core'a bağlı frontend worker sayısı", lambda: len(engine.links))
+metrics.Gauge("masis_front_queue_depth_max", "En dolu client gönderim kuyruğu",
+              lambda: max((len(c.queue) for c in engine.front_clients), default=0))
+metrics.Gauge("masis_front_queue_lag_max_seconds", "Client kuyruklarındaki en eski mesajın yaşı", _max_lag)
+metrics.Gauge("masis_ingest_log_dropped", "Kayıt kuyruğu dolduğu için yazılmayan ingest mesajları",
+              lambda: ingest_log.dropped if ingest_log else 0)
+
+def make_ingest_pool(mp_context=None) -> Optional[Executor]:
+    if INGEST_WORKERS <= 0:
+        return None
+    if INGEST_POOL == "thread":
+        return ThreadPoolExecutor(max_workers=INGEST_WORKERS, thread_name_prefix="ingest")
+    pool = ProcessPoolExecutor(max_workers=INGEST_WORKERS, mp_context=mp_context)
+    # Worker'ları port bind edilmeden önce başlat; yoksa fork'lanan
+    # süreçler dinleyen socket'i miras alır
+    pool.submit(int).result()
+    return pool
+
+def ingest_pool_broken(pool: Executor, e: BaseException) -> None:
+    """
+    Havuz süreci öldüyse (BrokenProcessPool) havuz bir daha iş kabul etmez:
+    yenisi arka planda kurulur, o sırada frame'ler inline çözülür.
+    """
+    global ingest_pool
+    if ingest_pool is not pool:
+        return  # başka bir bağlantı zaten ele aldı
+    log.error("[INGEST] decode pool broken, decoding inline until rebuilt: %r", e)
+    ingest_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+    asyncio.get_running_loop().create_task(rebuild_ingest_pool())
+
+async def rebuild_ingest_pool() -> None:
+    global ingest_pool
+    try:
+        # Port artık bind'lı: spawn ile başlayan süreçler dinleyen socket'i miras almaz
+        pool = await asyncio.to_thread(make_ingest_pool, multiprocessing.get_context("spawn"))
+    except Exception as e:
+        log.error("[INGEST] decode pool rebuild failed, staying inline: %r", e)
+        return
+    ingest_pool = pool
+    log.info("[INGEST] decode pool rebuilt (%s workers)", INGEST_WORKERS)
+
+def write_checkpoint(path: str, state: dict) -> int:
+    """
+    MAGIC + zlib(4 byte meta uzunluğu + JSON meta + int64 stat dizisi).
+    Önce process'e özel yan dosyaya yazılır, fsync'lenir ve rename edilir: yarım dosya kalmaz.
+    """
+    stats = state["stats"]
+    meta = codec.dumps({k: v for k, v in state.items() if k != "stats"} | {"stats_shape": list(stats.shape)})
+    body = zlib.compress(_CHECKPOINT_META_LEN.pack(len(meta)) + meta + stats.astype("<i8").tobytes(), 1)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(CHECKPOINT_MAGIC)
+        f.write(body)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return len(body) + len(CHECKPOINT_MAGIC)
+
+def read_checkpoint(path: str) -> dict:
+    with open(path, "rb") as f:
+        data = f.read()
+    if data[:len(CHECKPOINT_MAGIC)] != CHECKPOINT_MAGIC:
+        raise ValueError("not a checkpoint file")
+    raw = zlib.decompress(data[len(CHECKPOINT_MAGIC):])
+    (n,) = _CHECKPOINT_META_LEN.unpack_from(raw)
+    start = _CHECKPOINT_META_LEN.size
+    state = codec.loads(raw[start:start + n])
+    state["stats"] = np.frombuffer(raw, dtype="<i8", offset=start + n).reshape(state.pop("stats_shape"))
+    return state
+
+def load_checkpoint(path: str) -> None:
+    """Açılışta: dosya yoksa ya da bozuksa boş engine ile devam edilir"""
+    if not os.path.exists(path):
+        return
+    started = time.perf_counter()
+    try:
+        state = read_checkpoint(path)
+        loaded = engine.restore(state)
+    except (OSError, ValueError, KeyError, TypeError, zlib.error) as e:
+        log.warning("[CHECKPOINT] load failed, starting empty: %r", e)
+        return
+    log.info("[CHECKPOINT] restored %d games in %.1f ms (saved %d s ago)", loaded,
+             (time.perf_counter() - started) * 1000, (now_ms() - state["saved_ms"]) // 1000)
+
+# Periyodik kayıt thread'de sürerken kapanış kaydı başlarsa onu bekler
+_checkpoint_lock = threading.Lock()
+
+def save_checkpoint(path: str, state: dict) -> None:
+    try:
+        with _checkpoint_lock:
+            size = write_checkpoint(path, state)
+    except OSError as e:
+        log.warning("[CHECKPOINT] write failed: %r", e)
+        return
+    log.debug("[CHECKPOINT] %d games, %d bytes -> %s", len(state["games"]), size, path)
+
+async def checkpointer():
+    saved_epoch = engine.state_epoch
+    while True:
+        await asyncio.sleep(CHECKPOINT_S)
+        if engine.state_epoch == saved_epoch:
+            continue
+        saved_epoch = engine.state_epoch
+        await asyncio.to_thread(save_checkpoint, CHECKPOINT_PATH, engine.checkpoint())
+
+def archive_games(path: str, records: List[dict]) -> None:
+    """Silinen game'lerin son halini gzip'li JSON satırları olarak ekle"""
+    with gzip.open(path, "ab") as f:
+        for rec in records:
+            f.write(codec.dumps(rec))
+            f.write(b"\n")
+
+async def sweeper():
+    while True:
+        await asyncio.sleep(SWEEP_INTERVAL_S)
+        evicted = engine.sweep(now_ms())
+        if not evicted:
+            continue
+        log.info("[SWEEP] evicted %d games (tracked: %d)", len(evicted), len(engine.games))
+        if BROADCAST_TICK_MS <= 0:
+            engine.publish()
+        if ARCHIVE_PATH:
             try:
-                await ws.send(raw)
-            except Exception:
-                dead.append(ws)
-        for ws in dead:
+                await asyncio.to_thread(archive_games, ARCHIVE_PATH, evicted)
+            except OSError as e:
+                log.warning("[SWEEP] archive failed: %r", e)
+
+async def broadcaster():
+    """Her tick'te biriken event'leri ve maç değişikliklerini yayınla"""
+    while True:
+        await asyncio.sleep(BROADCAST_TICK_MS / 1000)
+        engine.publish()
+
+async def ingest_connection(ws):
+    """
+    Bir ingest bağlantısı için iki aşamalı pipeline:
+    reader frame'leri havuza gönderir, applier sonuçları geliş sırasıyla uygular.
+    v2 (wire.INGEST_SUBPROTOCOL) batch'lerinde her kayıt ayrı iş olarak gider.
+    """
+    loop = asyncio.get_running_loop()
+    conn = next(_ingest_conns)
+    pending: asyncio.Queue = asyncio.Queue(maxsize=max(1, INGEST_WORKERS) * 4)
+    last_seq: Optional[int] = None
+
+    def apply_anim_now(decode, *args):
+        INGEST_FRAMES.inc(labels=("anim",))
+        try:
+            with DECODE_TIME.time():
+                frame = decode(*args)
+        except Exception as e:
+            log.warning("[INGEST] anim decode failed: %r", e, extra=_RL_FRAME)
+            return
+        if isinstance(frame, AnimFrame):
+            engine.publish_anim(engine.apply_anim(frame))
+
+    def decode_inline(decode, *args) -> asyncio.Future:
+        fut = loop.create_future()
+        try:
+            fut.set_result(timed_decode(decode, *args))
+        except Exception as e:
+            fut.set_exception(e)
+        return fut
+
+    async def submit(decode, *args):
+        INGEST_FRAMES.inc(labels=("swarm",))
+        pool = ingest_pool
+        fut = None
+        if pool is not None:
             try:
-                self.front_clients.remove(ws)
-            except ValueError:
-                pass
+                fut = loop.run_in_executor(pool, timed_decode, decode, *args)
+            except BrokenExecutor as e:
+                ingest_pool_broken(pool, e)
+        if fut is None:
+            fut = decode_inline(decode, *args)
+        # Havuz iş sırasında ölürse applier frame'i inline tekrar çözer
+        await pending.put((fut, pool, decode, args))
 
-engine = Engine()
+    async def read_batch(msg: bytes):
+        nonlocal last_seq
+        try:
+            records = wire.unpack_ingest(msg)
+        except ValueError as e:
+            log.warning("[INGEST] bad v2 batch: %r", e, extra=_RL_FRAME)
+            return
+        ts = now_ms()
+        for rec in records:
+            if last_seq is not None and rec.seq != (last_seq + 1) & 0xffffffff:
+                log.warning("[INGEST] seq gap: %s -> %s", last_seq, rec.seq, extra=_RL_FRAME)
+            last_seq = rec.seq
+            log.debug("[INGEST] seq=%s kind=%s lag=%dms", rec.seq, rec.kind, ts - rec.captured_ms, extra=_RL_FRAME)
+            # Animation kayıtları küçük ve gecikmeye duyarlı: havuzdaki
+            # swarm frame'lerini beklemeden burada çözülüp hemen yayınlanır
+            if rec.kind == wire.KIND_ANIM:
+                apply_anim_now(decode_anim, rec.game_id, rec.payload)
+            elif rec.kind == wire.KIND_SWARM:
+                await submit(decode_swarm, rec.payload)
+
+    async def reader():
+        try:
+            async for msg in ws:
+                INGEST_BYTES.inc(len(msg) if isinstance(msg, bytes) else len(msg.encode()))
+                if ingest_log is not None:
+                    ingest_log.append(msg, conn)
+                if isinstance(msg, bytes) and msg[:3] == wire.INGEST_MAGIC:
+                    await read_batch(msg)
+                elif is_anim_frame(msg):
+                    apply_anim_now(decode_ingest, msg)
+                else:
+                    await submit(decode_ingest, msg)
+        except websockets.ConnectionClosed:
+            pass
+        except Exception:
+            log.exception("[INGEST] reader failed, closing connection")
+        finally:
+            await pending.put(None)
+
+    async def push_watched():
+        sent = None
+        try:
+            while True:
+                watched = sorted(engine.watched_games())
+                if watched != sent:
+                    await ws.send(codec.dumps_text({"type": "watched", "games": watched}))
+                    sent = watched
+                await asyncio.sleep(WATCHED_PUSH_S)
+        except websockets.ConnectionClosed:
+            pass
+
+    reader_task = asyncio.create_task(reader())
+    # Eski (JSON) collector'lar server'dan mesaj okumaz; sadece v2'ye gönderilir
+    watched_task = asyncio.create_task(push_watched()) if ws.subprotocol == wire.INGEST_SUBPROTOCOL else None
+    try:
+        while True:
+            item = await pending.get()
+            if item is None:
+                break
+            fut, pool, decode, args = item
+            try:
+                try:
+                    frame, took = await fut
+                except BrokenExecutor as e:
+                    ingest_pool_broken(pool, e)
+                    frame, took = await decode_inline(decode, *args)
+            except Exception as e:
+                log.warning("[INGEST] decode failed: %r", e, extra=_RL_FRAME)
+                continue
+            DECODE_TIME.observe(took)
+            if not frame:
+                continue
+            if isinstance(frame, AnimFrame):
+                engine.publish_anim(engine.apply_anim(frame))
+                continue
+
+            with APPLY_TIME.time():
+                events = engine.apply_frame(frame)
+            engine.add_events(events)
+            if BROADCAST_TICK_MS <= 0:
+                engine.publish()
+    except Exception:
+        log.exception("[INGEST] applier failed, closing connection")
+    finally:
+        reader_task.cancel()
+        if watched_task:
+            watched_task.cancel()
+
+async def worker_connection(ws):
+    """Core tarafı: bir frontend worker'ı tick mesajlarını alır, izlenen game'lerini ve metriklerini bildirir"""
+    link = WorkerLink(ws, engine)
+    engine.add_link(link)
+    link.enqueue(SNAPSHOT)
+    log.info("[CORE] frontend worker connected (workers: %d)", len(engine.links))
+
+    async def push_metrics():
+        while True:
+            families = metrics.collect(metrics_labels)
+            for other in engine.links:
+                if other is not link:
+                    families += other.metrics
+            link.enqueue(codec.dumps_text({"type": "metrics", "families": families}))
+            await asyncio.sleep(METRICS_PUSH_S)
+
+    metrics_task = asyncio.create_task(push_metrics())
+    try:
+        async for msg in ws:
+            obj = jloads_maybe(msg)
+            if not isinstance(obj, dict):
+                continue
+            if obj.get("type") == "watched":
+                link.watched = {str(g) for g in obj.get("games") or []}
+            elif obj.get("type") == "metrics":
+                link.metrics = obj.get("families") or []
+            # Worker aynasında seq boşluğu: tüm kanalların snapshot'ı
+            elif obj.get("type") == "resync":
+                link.enqueue(SNAPSHOT)
+    finally:
+        metrics_task.cancel()
+        link.close()
+        log.info("[CORE] frontend worker disconnected (workers: %d)", len(engine.links))
+
+async def relay_ingest(ws):
+    """Worker tarafı: SO_REUSEPORT ile buraya düşen /ingest bağlantısını core'a aynen aktar"""
+    protocols = [ws.subprotocol] if ws.subprotocol else None
+    async with websockets.unix_connect(CORE_SOCKET, "ws://core/ingest", subprotocols=protocols,
+                                       compression=None, max_size=8_000_000) as core:
+        async def pipe(src, dst):
+            async for msg in src:
+                await dst.send(msg)
+
+        tasks = [asyncio.create_task(pipe(ws, core)), asyncio.create_task(pipe(core, ws))]
+        try:
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for t in tasks:
+                t.cancel()
+
+async def core_link():
+    """Worker tarafı: core'a bağlı kal, gelen mesajları MirrorEngine'e uygula"""
+    while True:
+        try:
+            async with websockets.unix_connect(CORE_SOCKET, "ws://core/worker", compression=None,
+                                               max_size=None, ping_interval=None) as ws:
+                log.info("[WORKER] connected to core: %s", CORE_SOCKET)
+                # Core bağlanınca zaten tam snapshot gönderir
+                engine.resync_pending = engine.resync_sent = False
+
+                async def push_watched():
+                    sent = None
+                    while True:
+                        watched = sorted(engine.game_subs)
+                        if watched != sent:
+                            await ws.send(codec.dumps_text({"type": "watched", "games": watched}))
+                            sent = watched
+                        await asyncio.sleep(WATCHED_PUSH_S)
+
+                async def push_metrics():
+                    while True:
+                        await ws.send(codec.dumps_text({"type": "metrics", "families": metrics.collect(metrics_labels)}))
+                        await asyncio.sleep(METRICS_PUSH_S)
+
+                watched_task = asyncio.create_task(push_watched())
+                metrics_task = asyncio.create_task(push_metrics())
+                try:
+                    async for msg in ws:
+                        with BROADCAST_TIME.time():
+                            engine.apply_core(jloads_maybe(msg))
+                            engine.flush()
+                        if engine.resync_pending and not engine.resync_sent:
+                            engine.resync_sent = True
+                            await ws.send(codec.dumps_text({"type": "resync"}))
+                finally:
+                    watched_task.cancel()
+                    metrics_task.cancel()
+        except (OSError, websockets.WebSocketException) as e:
+            log.warning("[WORKER] core link lost: %r", e, extra=_RL_FRONT)
+        await asyncio.sleep(1)
 
 async def process_request(path, request_headers):
-    """HTTP isteklerini ele al (health check için)"""
+    """HTTP isteklerini ele al (health check ve Prometheus metrikleri için)"""
     if path in ["/", "/health"]:
         return (HTTPStatus.OK, [], b"OK\n")
+    if path == "/metrics":
+        sources = [metrics.collect(metrics_labels)]
+        if isinstance(engine, MirrorEngine):
+            sources.append(engine.core_metrics)
+        return (HTTPStatus.OK, [("Content-Type", "text/plain; version=0.0.4")], metrics.render(*sources))
     # WebSocket yükseltmesine izin ver
     return None
 
@@ -319,62 +1719,152 @@ async def handler(ws):
     path = ws_path(ws)
 
     if path.startswith("/frontend"):
-        engine.front_clients.append(ws)
-        await engine.broadcast_front({"type": "matches", "matches": engine.snapshot_matches()})
+        client = FrontClient(ws, engine)
+        engine.add_client(client)
+        # Tam snapshot sadece bağlanan client'a; sonrası matches_delta
+        client.enqueue(SNAPSHOT)
         try:
-            async for _ in ws:
-                pass
+            async for msg in ws:
+                obj = jloads_maybe(msg)
+                if not isinstance(obj, dict):
+                    continue
+                mtype = obj.get("type")
+                # Client seq boşluğu gördüyse tam snapshot ister
+                if mtype == "resync":
+                    client.enqueue(SNAPSHOT)
+                # {"type":"subscribe","games":[...],"sport":"all|Soccer|Basketball","list_only":false}
+                # Yeniden bağlanan client "last_seq" ekler: kaçırdığı event'ler replay edilir
+                elif mtype == "subscribe":
+                    games = obj.get("games")
+                    games = [str(g) for g in games] if isinstance(games, list) else []
+                    engine.subscribe(client, games, str(obj.get("sport") or "all"), bool(obj.get("list_only")))
+                    if "last_seq" in obj:
+                        engine.replay(client, safe_int(obj.get("last_seq")))
         finally:
-            if ws in engine.front_clients:
-                engine.front_clients.remove(ws)
+            client.close()
         return
 
     if path.startswith("/ingest"):
-        async for msg in ws:
-            obj = jloads_maybe(msg)
-            if not isinstance(obj, dict):
-                continue
-
-            swarm_obj = None
-            if obj.get("kind") == "swarm_recv":
-                swarm_obj = jloads_maybe(obj.get("payload"))
-            elif "code" in obj and "data" in obj:
-                swarm_obj = obj
-
-            if not isinstance(swarm_obj, dict):
-                continue
-
-            events = engine.apply_swarm_payload(swarm_obj)
-
-            if events:
-                await engine.broadcast_front({
-                    "type": "events",
-                    "events": [{"game_id": e.game_id, "etype": e.type, "team": e.team, "ts": e.ts} for e in events],
-                })
-
-            await engine.broadcast_front({"type": "matches", "matches": engine.snapshot_matches()})
+        if isinstance(engine, MirrorEngine):
+            await relay_ingest(ws)
+        else:
+            await ingest_connection(ws)
         return
 
-    # başka path geldiyse kapat
+    # başka path geldiyse kapat (/worker dış portta yok: tüm event'leri ve metrikleri alır)
     await ws.close()
 
-async def main():
-    print(f"[SERVER] Starting on {HOST}:{PORT}")
-    print(f"  - HTTP health check: http://{HOST}:{PORT}/health")
-    print(f"  - WebSocket frontend: ws://{HOST}:{PORT}/frontend")
-    print(f"  - WebSocket ingest: ws://{HOST}:{PORT}/ingest")
-    
-    # WebSocket server'ı process_request callback ile başlat
-    async with websockets.serve(
+async def core_handler(ws):
+    """Core Unix socket'i: sadece worker linkleri ve worker'ların aktardığı ingest"""
+    path = ws_path(ws)
+    if path.startswith("/worker"):
+        await worker_connection(ws)
+    elif path.startswith("/ingest"):
+        await ingest_connection(ws)
+    else:
+        await ws.close()
+
+def serve_public(**kwargs):
+    """Dış port: frontend + ingest (+ health check)"""
+    return websockets.serve(
         handler,
         HOST,
         PORT,
         process_request=process_request,
+        subprotocols=[wire.INGEST_SUBPROTOCOL, wire.SUBPROTOCOL],
+        compression=None,
+        extensions=wire.server_deflate(),
         ping_interval=20,
         ping_timeout=20,
+        max_size=8_000_000,
+        **kwargs
+    )
+
+def serve_core():
+    """Core'un Unix socket'i: worker linkleri ve worker'ların aktardığı ingest"""
+    if os.path.exists(CORE_SOCKET):
+        os.unlink(CORE_SOCKET)
+    return websockets.unix_serve(
+        core_handler,
+        CORE_SOCKET,
+        subprotocols=[wire.INGEST_SUBPROTOCOL],
+        compression=None,
+        ping_interval=None,
         max_size=8_000_000
-    ):
-        await asyncio.Future()
+    )
+
+def start_front_workers() -> list:
+    # spawn: worker'lar core'un event loop'unu, havuzunu ve socket'lerini miras almaz
+    ctx = multiprocessing.get_context("spawn")
+    workers = [ctx.Process(target=run_worker, args=(i,), name=f"front-{i}", daemon=True)
+               for i in range(FRONT_WORKERS)]
+    for w in workers:
+        w.start()
+    return workers
+
+async def main():
+    global ingest_pool, ingest_log
+    ingest_pool = make_ingest_pool()
+    ingest_log = ingestlog.open_from_env()
+    if CHECKPOINT_PATH:
+        load_checkpoint(CHECKPOINT_PATH)
+    log.info("[SERVER] Starting on %s:%s", HOST, PORT)
+    log.info("  - HTTP health check: http://%s:%s/health", HOST, PORT)
+    log.info("  - Prometheus metrics: http://%s:%s/metrics", HOST, PORT)
+    log.info("  - WebSocket frontend: ws://%s:%s/frontend", HOST, PORT)
+    log.info("  - WebSocket ingest: ws://%s:%s/ingest", HOST, PORT)
+    log.info("  - ingest workers: %s (%s)", INGEST_WORKERS, INGEST_POOL if ingest_pool else "inline")
+    log.info("  - json backend: %s", codec.BACKEND)
+    if CHECKPOINT_PATH:
+        log.info("  - checkpoint: %s (every %s s)", CHECKPOINT_PATH, CHECKPOINT_S)
+    log.info("  - broadcast tick: %s ms%s", BROADCAST_TICK_MS,
+             " (events immediate)" if BROADCAST_EVENTS_IMMEDIATE else "")
+    if FRONT_WORKERS > 0:
+        log.info("  - frontend workers: %d (core: %s)", FRONT_WORKERS, CORE_SOCKET)
+
+    # WebSocket server'ı process_request callback ile başlat;
+    # worker modunda dış portu worker'lar açar, core sadece Unix socket'te dinler
+    async with (serve_core() if FRONT_WORKERS > 0 else serve_public()):
+        workers = start_front_workers() if FRONT_WORKERS > 0 else []
+        # Render deploy'da SIGTERM gelir; worker'ları da düzgün kapat
+        stop = asyncio.get_running_loop().create_future()
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stop.set_result, None)
+        tasks = [asyncio.create_task(sweeper())]
+        if BROADCAST_TICK_MS > 0:
+            tasks.append(asyncio.create_task(broadcaster()))
+        if CHECKPOINT_PATH:
+            tasks.append(asyncio.create_task(checkpointer()))
+        await stop
+        for task in tasks:
+            task.cancel()
+        if CHECKPOINT_PATH:
+            save_checkpoint(CHECKPOINT_PATH, engine.checkpoint())
+        for w in workers:
+            w.terminate()
+        for w in workers:
+            w.join(timeout=5)
+
+    if ingest_pool is not None:
+        ingest_pool.shutdown(cancel_futures=True)
+
+async def worker_main(index: int):
+    global engine
+    engine = MirrorEngine()
+    metrics_labels["process"] = f"worker-{index}"
+    async with serve_public(reuse_port=True):
+        log.info("[WORKER] %d serving frontend on %s:%s", index, HOST, PORT)
+        stop = asyncio.get_running_loop().create_future()
+        # Core çıkarken multiprocessing daemon worker'lara SIGTERM'i tekrar gönderebilir
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, lambda: stop.done() or stop.set_result(None))
+        link = asyncio.create_task(core_link())
+        await stop
+        link.cancel()
+
+def run_worker(index: int) -> None:
+    try:
+        asyncio.run(worker_main(index))
+    except KeyboardInterrupt:
+        pass
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,105 @@
+"""
+Lokal swarm yerine geçen test server'ı (collector direct modu için).
+
+    python swarm_standin.py                       # ws://localhost:8790
+    SWARM_URL=ws://localhost:8790 COLLECT_MODE=direct RENDER_URL=false python collector.py
+
+request_session'a sid, "get" isteğine subid + tam snapshot döner; sonra her
+saniye aynı subid altında diff (dakika, atak sayıları, ara sıra gol) gönderir.
+Spor, isteğin where.sport.alias alanından seçilir (Soccer/Basketball).
+"""
+import asyncio
+import json
+import os
+import random
+
+import websockets
+
+PORT = int(os.getenv("STANDIN_PORT", 8790))
+GAMES_PER_SPORT = int(os.getenv("STANDIN_GAMES", 5))
+SPORT_IDS = {"Soccer": "1", "Basketball": "3"}
+
+def make_games(sport: str) -> dict:
+    base = 100000 if sport == "Soccer" else 200000
+    return {
+        str(base + i): {
+            "team1_name": f"{sport} Home {i}",
+            "team2_name": f"{sport} Away {i}",
+            "is_live": 1,
+            "info": {"score1": "0", "score2": "0", "current_game_time": "1"},
+            "stats": {
+                "attack": {"team1_value": 0, "team2_value": 0},
+                "dangerous_attack": {"team1_value": 0, "team2_value": 0},
+                "corner": {"team1_value": 0, "team2_value": 0},
+            },
+        }
+        for i in range(GAMES_PER_SPORT)
+    }
+
+def wrap(sport: str, games: dict) -> dict:
+    return {"sport": {SPORT_IDS.get(sport, "1"): {
+        "name": sport, "alias": sport,
+        "region": {"1": {"name": "Standin", "competition": {"1": {"name": "Standin Lig", "game": games}}}},
+    }}}
+
+def tick(games: dict) -> dict:
+    """Her game için küçük bir diff üret ve state'e uygula"""
+    diff = {}
+    for gid, g in games.items():
+        side = random.choice(("team1_value", "team2_value"))
+        stats = g["stats"]
+        stats["attack"][side] += 1
+        d = {"stats": {"attack": {side: stats["attack"][side]}}}
+        if random.random() < 0.3:
+            stats["dangerous_attack"][side] += 1
+            d["stats"]["dangerous_attack"] = {side: stats["dangerous_attack"][side]}
+        minute = int(g["info"]["current_game_time"]) + 1
+        g["info"]["current_game_time"] = str(minute)
+        d["info"] = {"current_game_time": str(minute)}
+        if random.random() < 0.05:
+            key = "score1" if side == "team1_value" else "score2"
+            g["info"][key] = str(int(g["info"][key]) + 1)
+            d["info"][key] = g["info"][key]
+        diff[gid] = d
+    return diff
+
+async def stream(ws, subid: str, sport: str, games: dict):
+    while True:
+        await asyncio.sleep(1)
+        await ws.send(json.dumps({"code": 0, "rid": "0", "data": {subid: wrap(sport, tick(games))}}))
+
+async def handler(ws):
+    tasks = []
+    try:
+        async for msg in ws:
+            try:
+                req = json.loads(msg)
+            except ValueError:
+                continue
+            rid = req.get("rid")
+            command = req.get("command")
+            if command == "request_session":
+                await ws.send(json.dumps({"code": 0, "rid": rid, "data": {"sid": "standin"}}))
+            elif command == "get":
+                params = req.get("params") or {}
+                sport = ((params.get("where") or {}).get("sport") or {}).get("alias") or "Soccer"
+                subid = str(1000 + len(tasks))
+                games = make_games(sport)
+                await ws.send(json.dumps({"code": 0, "rid": rid, "data": {"subid": subid, "data": wrap(sport, games)}}))
+                print(f"[STANDIN] subscribe {sport} -> subid {subid}")
+                tasks.append(asyncio.create_task(stream(ws, subid, sport, games)))
+            else:
+                await ws.send(json.dumps({"code": 0, "rid": rid, "data": {}}))
+    except websockets.ConnectionClosed:
+        pass
+    finally:
+        for t in tasks:
+            t.cancel()
+
+async def main():
+    async with websockets.serve(handler, "0.0.0.0", PORT):
+        print(f"[STANDIN] swarm stand-in: ws://localhost:{PORT}")
+        await asyncio.Future()
+
+if __name__ == "__main__":
+    asyncio.run(main())
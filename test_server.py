@@ -0,0 +1,142 @@
+"""
+server.py testleri: swarm frame uygulama, animation event yayını, core -> worker
+linki (WorkerLink taşması, MirrorEngine seq boşluğu).
+
+    python -m unittest test_server       # ya da: python -m pytest test_server.py
+"""
+import asyncio
+import json
+import logging
+import unittest
+
+import server
+
+server.log.setLevel(logging.ERROR)
+
+class StuckWs:
+    """send() hiç bitmeyen (yetişemeyen) bağlantı"""
+    subprotocol = None
+
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, data):
+        self.sent.append(data)
+        await asyncio.Event().wait()
+
+    async def close(self, code=1000, reason=""):
+        pass
+
+def delta(channel: str, seq: int, upserts=(), removed=()) -> dict:
+    return {"type": "matches_delta", "channel": channel, "seq": seq,
+            "upserts": list(upserts), "removed": list(removed)}
+
+def match(gid: str, score1: int = 0) -> dict:
+    return {"game_id": gid, "title": "A vs B", "team1": "A", "team2": "B", "score1": score1, "score2": 0,
+            "minute": "1", "sport": "Soccer", "tournament": "T", "is_live": 1, "last_update_ms": 1}
+
+def swarm(competitions: dict) -> dict:
+    """{competition_id: {game_id: corner team1_value}} -> swarm payload"""
+    return {"code": 200, "data": {"sport": {"1": {"region": {"1": {"competition": {
+        cid: {"game": {gid: {"stats": {"corner": {"team1_value": v, "team2_value": 0}}} for gid, v in games.items()}}
+        for cid, games in competitions.items()}}}}}}}
+
+class ApplyFrameTest(unittest.TestCase):
+    def events(self, engine, payload):
+        return [(e.game_id, e.type, e.team) for e in engine.apply_swarm_payload(payload)]
+
+    def test_duplicate_game_last_entry_wins(self):
+        # Aynı game iki competition altında: eski dict davranışı gibi sadece son obje uygulanır
+        dup, single = server.Engine(), server.Engine()
+        for frame in ({"1": {"5": 0, "6": 0}, "2": {"5": 0}},
+                      {"1": {"5": 1, "6": 1}, "2": {"5": 2}},
+                      {"1": {"5": 3}, "2": {"5": 1}},
+                      {"1": {"5": 1}, "2": {"5": 4}}):
+            last = {}
+            for games in frame.values():
+                last.update(games)
+            self.assertEqual(self.events(dup, swarm(frame)), self.events(single, swarm({"1": last})))
+        self.assertEqual(list(dup.games), list(single.games))
+
+class AnimPublishTest(unittest.IsolatedAsyncioTestCase):
+    def received(self, client):
+        """Client'a giden event'ler (gönderilmekte olan + kuyrukta bekleyen)"""
+        msgs = [json.loads(raw) for raw in client.ws.sent + [raw for raw, _ in client.queue]]
+        msgs = [m for msg in msgs for m in msg.get("messages", [msg])]
+        return [(e["game_id"], e["seq"]) for m in msgs for e in m.get("events", ())]
+
+    async def test_only_game_subscribers_get_anim_immediately(self):
+        engine = server.Engine()
+        everything = server.FrontClient(StuckWs(), engine)
+        sub = server.FrontClient(StuckWs(), engine)
+        other = server.FrontClient(StuckWs(), engine)
+        for client in (everything, sub, other):
+            engine.add_client(client)
+        engine.subscribe(sub, ["1"], "all", False)
+        engine.subscribe(other, ["2"], "all", False)
+        link = server.WorkerLink(StuckWs(), engine)
+        engine.add_link(link)
+
+        engine.publish_anim([server.Event(game_id="1", type="corner", team=1, ts=1)])
+        seq = engine.event_seq
+        self.assertEqual(self.received(sub), [("1", seq)])
+        self.assertEqual(self.received(everything), [])
+        self.assertEqual(self.received(link), [])
+        self.assertEqual(self.received(other), [])
+
+        # Tüm-event client'ları ve worker linkleri tick'te, tek frame içinde alır
+        engine.publish()
+        self.assertEqual(self.received(everything), [("1", seq)])
+        self.assertEqual(self.received(link), [("1", seq)])
+        self.assertEqual(self.received(sub), [("1", seq)])
+        self.assertEqual(self.received(other), [])
+        for client in (everything, sub, other, link):
+            client.close()
+
+class WorkerLinkOverflowTest(unittest.IsolatedAsyncioTestCase):
+    async def test_link_coalesces_even_with_drop_oldest(self):
+        old = server.FRONT_OVERFLOW
+        server.FRONT_OVERFLOW = "drop_oldest"
+        try:
+            engine = server.Engine()
+            ws = StuckWs()
+            link = server.WorkerLink(ws, engine)
+            viewer = server.FrontClient(StuckWs(), engine)
+        finally:
+            server.FRONT_OVERFLOW = old
+        self.assertEqual(viewer.overflow, "drop_oldest")
+        await asyncio.sleep(0)
+        for i in range(server.FRONT_QUEUE_MAX + 10):
+            link.enqueue(f'{{"type":"matches_delta","seq":{i + 1}}}')
+        # Taşmada delta'lar atılmaz: kuyruk tek snapshot + sonrasına iner
+        self.assertIs(link.queue[0][0], server.SNAPSHOT)
+        self.assertLess(len(link.queue), server.FRONT_QUEUE_MAX)
+        self.assertFalse(link.closed)
+        link.close()
+        viewer.close()
+
+class MirrorSeqTest(unittest.TestCase):
+    def test_gap_requests_snapshot(self):
+        mirror = server.MirrorEngine()
+        mirror.apply_core({"type": "matches", "channel": "all", "seq": 5, "matches": [match("1"), match("2")]})
+        mirror.apply_core(delta("all", 6, upserts=[match("1", score1=1)]))
+        self.assertEqual(mirror.mirror["all"]["1"]["score1"], 1)
+        self.assertFalse(mirror.resync_pending)
+
+        # 7 kayboldu (link taştı): 8 uygulanmaz, snapshot istenir
+        mirror.apply_core(delta("all", 8, removed=["2"]))
+        self.assertTrue(mirror.resync_pending)
+        self.assertIn("2", mirror.mirror["all"])
+        self.assertEqual(mirror.channels["all"].seq, 6)
+        # Snapshot gelene kadar sonraki delta'lar da bekler
+        mirror.apply_core(delta("all", 9, upserts=[match("3")]))
+        self.assertNotIn("3", mirror.mirror["all"])
+
+        mirror.apply_core({"type": "matches", "channel": "all", "seq": 9, "matches": [match("1", 1), match("3")]})
+        self.assertFalse(mirror.resync_pending)
+        self.assertEqual(list(mirror.mirror["all"]), ["1", "3"])
+        mirror.apply_core(delta("all", 10, removed=["1"]))
+        self.assertEqual(list(mirror.mirror["all"]), ["3"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,254 @@
+"""
+wire.py testleri: MessagePack alt kümesi (ve live_anim.html'deki JS decoder'ı),
+ingest v2 (MI2) batch formatı.
+
+    python -m unittest test_wire       # ya da: python -m pytest test_wire.py
+
+JS testleri node yoksa atlanır.
+"""
+import json
+import math
+import os
+import random
+import shutil
+import struct
+import subprocess
+import unittest
+
+import wire
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# (değer, beklenen ilk byte): format sınırlarının iki yanı
+INT_CASES = [
+    (0, 0x00), (1, 0x01), (0x7f, 0x7f),
+    (0x80, 0xcc), (0xff, 0xcc),
+    (0x100, 0xcd), (0xffff, 0xcd),
+    (0x10000, 0xce), (0xffffffff, 0xce),
+    (0x100000000, 0xcf), (2 ** 53, 0xcf), (2 ** 64 - 1, 0xcf),
+    (-1, 0xff), (-32, 0xe0),
+    (-33, 0xd0), (-0x80, 0xd0),
+    (-0x81, 0xd1), (-0x8000, 0xd1),
+    (-0x8001, 0xd2), (-0x80000000, 0xd2),
+    (-0x80000001, 0xd3), (-(2 ** 53), 0xd3), (-(2 ** 63), 0xd3),
+]
+
+# (uzunluk, beklenen ilk byte)
+STR_CASES = [(0, 0xa0), (31, 0xbf), (32, 0xd9), (0xff, 0xd9), (0x100, 0xda), (0xffff, 0xda), (0x10000, 0xdb)]
+BIN_CASES = [(0, 0xc4), (0xff, 0xc4), (0x100, 0xc5), (0xffff, 0xc5), (0x10000, 0xc6)]
+ARRAY_CASES = [(0, 0x90), (15, 0x9f), (16, 0xdc), (0xffff, 0xdc), (0x10000, 0xdd)]
+MAP_CASES = [(0, 0x80), (15, 0x8f), (16, 0xde), (0xffff, 0xde), (0x10000, 0xdf)]
+
+NESTED = {
+    "type": "batch",
+    "messages": [
+        {"type": "matches_delta", "seq": 7, "upserts": [[12345, "Galatasaray", "Fenerbahçe", 2, 1, "67'",
+                                                         "Soccer", "Süper Lig", 1, 1792283998791]],
+         "removed": [1, "0012"], "order": [12345, 1]},
+        {"type": "events", "replay": True, "reset": False, "events": [[12345, "CORNER", None, 1792283998791, 42]]},
+    ],
+    "nested": {"a": [[], {}, [None, [True, [False]]]], "ü": {"x": -1.5}},
+}
+
+class PackTest(unittest.TestCase):
+    def roundtrip(self, value):
+        packed = wire.packb(value)
+        self.assertEqual(wire.unpackb(packed), value)
+        return packed
+
+    def test_int_boundaries(self):
+        for n, head in INT_CASES:
+            with self.subTest(n=n):
+                self.assertEqual(self.roundtrip(n)[0], head)
+
+    def test_none_bool(self):
+        self.assertEqual(wire.packb(None), b"\xc0")
+        self.assertEqual(wire.packb(False), b"\xc2")
+        self.assertEqual(wire.packb(True), b"\xc3")
+        for v in (None, False, True):
+            self.assertIs(wire.unpackb(wire.packb(v)), v)
+
+    def test_floats(self):
+        for f in (0.0, -0.0, 1.5, -2.25, 1e-300, 1.7976931348623157e308, math.inf, -math.inf):
+            with self.subTest(f=f):
+                packed = self.roundtrip(f)
+                self.assertEqual(packed[0], 0xcb)
+        self.assertTrue(math.isnan(wire.unpackb(wire.packb(math.nan))))
+        # float32 sadece decode tarafında var
+        self.assertEqual(wire.unpackb(b"\xca" + struct.pack(">f", 0.5)), 0.5)
+
+    def test_str_lengths(self):
+        for n, head in STR_CASES:
+            with self.subTest(n=n):
+                self.assertEqual(self.roundtrip("x" * n)[0], head)
+        # Uzunluk byte cinsinden: çok byte'lı UTF-8 sınırı karakter sayısından önce aşar
+        self.assertEqual(self.roundtrip("ş" * 16)[0], 0xd9)
+
+    def test_bin_lengths(self):
+        for n, head in BIN_CASES:
+            with self.subTest(n=n):
+                self.assertEqual(self.roundtrip(bytes(range(256)) * (n // 256) + bytes(n % 256))[0], head)
+        self.assertEqual(wire.unpackb(wire.packb(bytearray(b"ab"))), b"ab")
+
+    def test_array_and_map_lengths(self):
+        for n, head in ARRAY_CASES:
+            with self.subTest(array=n):
+                self.assertEqual(self.roundtrip(list(range(n)))[0], head)
+        for n, head in MAP_CASES:
+            with self.subTest(map=n):
+                self.assertEqual(self.roundtrip({str(i): i for i in range(n)})[0], head)
+        self.assertEqual(wire.unpackb(wire.packb((1, "a"))), [1, "a"])
+
+    def test_nested(self):
+        self.roundtrip(NESTED)
+
+    def test_rejects_bad_input(self):
+        with self.assertRaises(TypeError):
+            wire.packb(object())
+        with self.assertRaises(ValueError):
+            wire.unpackb(b"\xc1")
+        with self.assertRaises(ValueError):
+            wire.unpackb(wire.packb(1) + b"\x00")
+
+    def test_encode_front_rows(self):
+        match = {"game_id": "12345", "team1": "A", "team2": "B", "score1": 1, "score2": 0, "minute": "12",
+                 "sport": "Soccer", "tournament": "T", "is_live": 1, "last_update_ms": 1792283998791}
+        msg = wire.unpackb(wire.encode_front({"type": "matches_delta", "seq": 1, "upserts": [match],
+                                              "removed": ["0012", "7"], "order": ["12345", "0012"]}))
+        self.assertEqual(msg["upserts"], [[match[k] if k != "game_id" else 12345 for k in wire.MATCH_FIELDS]])
+        # Baştaki sıfırlı id'ler string kalır
+        self.assertEqual(msg["removed"], ["0012", 7])
+        self.assertEqual(msg["order"], [12345, "0012"])
+
+    def test_large_game_ids_stay_exact(self):
+        # 2^53 üstü id'ler JS'te yuvarlanır: string olarak gitmeli
+        ids = [str(2 ** 53 - 1), str(2 ** 53), "12345678901234567", "9" * 18]
+        msg = wire.unpackb(wire.encode_front({"type": "matches_delta", "seq": 1, "upserts": [],
+                                              "removed": ids, "order": ids}))
+        self.assertEqual(msg["removed"], [2 ** 53 - 1] + ids[1:])
+        self.assertEqual([str(g) for g in msg["order"]], ids)
+
+def _ingest_records() -> list:
+    swarm = b'{"code":200,"data":{"sport":{}}}'
+    return [
+        wire.IngestRecord(wire.KIND_SWARM, wire.SOURCE_SPORTS["Soccer"], 1, 1792283998791, "", swarm),
+        wire.IngestRecord(wire.KIND_ANIM, wire.SOURCE_SPORTS["Basketball"], 2, 1792283998792, "12345",
+                          b'{"type":"corner","team":"home"}'),
+        wire.IngestRecord(wire.KIND_ANIM, 0, 3, 1792283998793, "şğ-7", b""),
+        wire.IngestRecord(wire.KIND_SWARM, 0, 0xffffffff, 2 ** 64 - 1, "", bytes(range(256)) * 300),
+    ]
+
+class IngestBatchTest(unittest.TestCase):
+    def test_roundtrip_mixed(self):
+        records = _ingest_records()
+        self.assertEqual(wire.unpack_ingest(wire.pack_ingest(records)), records)
+
+    def test_empty_batch(self):
+        data = wire.pack_ingest([])
+        self.assertEqual(data, wire.INGEST_MAGIC + b"\x00\x00")
+        self.assertEqual(wire.unpack_ingest(data), [])
+
+    def test_str_payload_and_seq_wrap(self):
+        rec = wire.IngestRecord(wire.KIND_SWARM, 0, 2 ** 32 + 5, 1, "", '{"ü":1}')
+        (got,) = wire.unpack_ingest(wire.pack_ingest([rec]))
+        self.assertEqual(got.payload, '{"ü":1}'.encode("utf-8"))
+        self.assertEqual(got.seq, 5)
+
+    def test_bad_magic(self):
+        for data in (b"", b"MI", b"MI1\x00\x00", b"{\"kind\":\"anim\"}", b"\x00" * 32):
+            with self.subTest(data=data[:8]):
+                with self.assertRaises(ValueError):
+                    wire.unpack_ingest(data)
+
+    def test_truncated(self):
+        data = wire.pack_ingest(_ingest_records()[:3])
+        for n in range(len(data)):
+            with self.subTest(n=n):
+                with self.assertRaises(ValueError):
+                    wire.unpack_ingest(data[:n])
+
+    def test_trailing_bytes(self):
+        with self.assertRaises(ValueError):
+            wire.unpack_ingest(wire.pack_ingest(_ingest_records()[:2]) + b"\x00")
+
+    def test_count_larger_than_records(self):
+        data = bytearray(wire.pack_ingest(_ingest_records()[:2]))
+        data[3:5] = (3).to_bytes(2, "big")
+        with self.assertRaises(ValueError):
+            wire.unpack_ingest(bytes(data))
+
+    def test_corrupted_only_value_error(self):
+        # server.py reader sadece ValueError yakalar: bozuk batch başka exception atmamalı
+        data = wire.pack_ingest(_ingest_records()[:3])
+        rng = random.Random(11)
+        for _ in range(2000):
+            buf = bytearray(data)
+            for _ in range(rng.randint(1, 4)):
+                buf[rng.randrange(3, len(buf))] = rng.randrange(256)
+            try:
+                wire.unpack_ingest(bytes(buf))
+            except ValueError:
+                pass
+
+def _js_unpack_source() -> str:
+    with open(os.path.join(HERE, "live_anim.html"), encoding="utf-8") as f:
+        html = f.read()
+    start = html.index("function unpack(buf){")
+    end = html.index("\n  return read();\n}\n", start) + len("\n  return read();\n}\n")
+    return html[start:end]
+
+# JS decoder'ın çıktısı JSON'a çevrilir; bin -> {"$bin": hex}
+_JS_DRIVER = """
+const utf8 = new TextDecoder();
+%s
+const enc = (v)=> v instanceof Uint8Array ? {"$bin": Buffer.from(v).toString("hex")}
+  : Array.isArray(v) ? v.map(enc)
+  : (v && typeof v === "object") ? Object.fromEntries(Object.entries(v).map(([k, x])=>[k, enc(x)]))
+  : v;
+const out = JSON.parse(require("fs").readFileSync(0, "utf8")).map((hex)=>{
+  const b = Buffer.from(hex, "hex");
+  return enc(unpack(b.buffer.slice(b.byteOffset, b.byteOffset + b.length)));
+});
+process.stdout.write(JSON.stringify(out));
+"""
+
+def _json_form(v):
+    if isinstance(v, (bytes, bytearray)):
+        return {"$bin": bytes(v).hex()}
+    if isinstance(v, (list, tuple)):
+        return [_json_form(x) for x in v]
+    if isinstance(v, dict):
+        return {k: _json_form(x) for k, x in v.items()}
+    return v
+
+@unittest.skipIf(shutil.which("node") is None, "node yok")
+class JsUnpackTest(unittest.TestCase):
+    """live_anim.html'deki decoder Python encoder'ının çıktısını aynı okur"""
+
+    def run_js(self, packed: list) -> list:
+        proc = subprocess.run(["node", "-e", _JS_DRIVER % _js_unpack_source()],
+                              input=json.dumps([p.hex() for p in packed]),
+                              capture_output=True, text=True, timeout=60)
+        self.assertEqual(proc.returncode, 0, proc.stderr)
+        return json.loads(proc.stdout)
+
+    def test_large_game_ids(self):
+        # Client game_id'yi String(...) ile geri kurar; yuvarlanmış id yanlış game'e gider
+        ids = [str(2 ** 53 - 1), str(2 ** 53), "12345678901234567", "9" * 18, "0012", "7"]
+        event = {"game_id": "", "etype": "CORNER", "team": 1, "ts": 1, "seq": 1}
+        packed = [wire.encode_front({"type": "events", "events": [dict(event, game_id=g) for g in ids]})]
+        (msg,) = self.run_js(packed)
+        self.assertEqual([str(row[0]) for row in msg["events"]], ids)
+
+    def test_matches_python(self):
+        # JS Number: 2^53 üstü int'ler birebir temsil edilemez, dışarıda kalır
+        values = [n for n, _ in INT_CASES if abs(n) <= 2 ** 53]
+        values += ["x" * n for n, _ in STR_CASES] + ["ş" * 16, "Fenerbahçe"]
+        values += [bytes(n % 256 for n in range(n)) for n, _ in BIN_CASES]
+        values += [list(range(n)) for n, _ in ARRAY_CASES[:-1]] + [{str(i): i for i in range(n)} for n, _ in MAP_CASES[:-1]]
+        values += [None, True, False, 1.5, -2.25, NESTED]
+        for value, got in zip(values, self.run_js([wire.packb(v) for v in values])):
+            self.assertEqual(got, _json_form(value))
+
+if __name__ == "__main__":
+    unittest.main()
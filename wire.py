@@ -0,0 +1,320 @@
+"""
+Kompakt binary wire formatı ve permessage-deflate ayarları (server.py, collector.py).
+
+- Format: MessagePack (alt küme), WebSocket subprotocol SUBPROTOCOL ile seçilir.
+  Subprotocol teklif etmeyen client'lar JSON text frame ile devam eder.
+- v1 şeması: alan adları her mesajda tekrar gönderilmez, satırlar pozisyoneldir
+    match: MATCH_FIELDS sırasında liste (title client'ta "team1 vs team2" kurulur)
+    event: EVENT_FIELDS sırasında liste (seq sonda: eski client'lar fazla sütunu yok sayar)
+  Sayısal game_id'ler int olarak gider, client string'e geri çevirir.
+- Ingest v2 (INGEST_SUBPROTOCOL): collector birden fazla ham swarm/anim frame'ini
+  tek binary mesajda, kayıt başına küçük bir header ile gönderir; payload
+  JSON içinde tekrar encode edilmez, server her payload'u tek kez çözer.
+- Deflate: context takeover açık, pencere/hafıza env ile ayarlanır
+  (tekrarlayan maç listesi için büyük pencere belirgin şekilde daha iyi sıkıştırır).
+"""
+import os
+import struct
+from typing import Any, List, NamedTuple, Tuple, Union
+
+from websockets.extensions.permessage_deflate import (
+    ClientPerMessageDeflateFactory,
+    ServerPerMessageDeflateFactory,
+)
+
+SUBPROTOCOL = "masis.msgpack.v1"
+INGEST_SUBPROTOCOL = "masis.ingest.v2"
+
+MATCH_FIELDS = ("game_id", "team1", "team2", "score1", "score2", "minute",
+                "sport", "tournament", "is_live", "last_update_ms")
+EVENT_FIELDS = ("game_id", "etype", "team", "ts", "seq")
+
+DEFLATE_WINDOW_BITS = int(os.getenv("DEFLATE_WINDOW_BITS", 15))
+DEFLATE_MEM_LEVEL = int(os.getenv("DEFLATE_MEM_LEVEL", 8))
+DEFLATE_LEVEL = int(os.getenv("DEFLATE_LEVEL", 6))
+
+def server_deflate() -> list:
+    return [ServerPerMessageDeflateFactory(
+        server_max_window_bits=DEFLATE_WINDOW_BITS,
+        client_max_window_bits=DEFLATE_WINDOW_BITS,
+        compress_settings={"level": DEFLATE_LEVEL, "memLevel": DEFLATE_MEM_LEVEL},
+    )]
+
+def client_deflate() -> list:
+    return [ClientPerMessageDeflateFactory(
+        server_max_window_bits=DEFLATE_WINDOW_BITS,
+        client_max_window_bits=DEFLATE_WINDOW_BITS,
+        compress_settings={"level": DEFLATE_LEVEL, "memLevel": DEFLATE_MEM_LEVEL},
+    )]
+
+# ---------------------------------------------------------------------------
+# MessagePack encode
+# ---------------------------------------------------------------------------
+
+def _pack_int(n: int, buf: bytearray) -> None:
+    if 0 <= n < 0x80:
+        buf.append(n)
+    elif -32 <= n < 0:
+        buf.append(n & 0xff)
+    elif n >= 0:
+        if n < 0x100:
+            buf += b"\xcc" + struct.pack(">B", n)
+        elif n < 0x10000:
+            buf += b"\xcd" + struct.pack(">H", n)
+        elif n < 0x100000000:
+            buf += b"\xce" + struct.pack(">I", n)
+        else:
+            buf += b"\xcf" + struct.pack(">Q", n)
+    else:
+        if n >= -0x80:
+            buf += b"\xd0" + struct.pack(">b", n)
+        elif n >= -0x8000:
+            buf += b"\xd1" + struct.pack(">h", n)
+        elif n >= -0x80000000:
+            buf += b"\xd2" + struct.pack(">i", n)
+        else:
+            buf += b"\xd3" + struct.pack(">q", n)
+
+def _pack_str(s: str, buf: bytearray) -> None:
+    b = s.encode("utf-8")
+    n = len(b)
+    if n < 32:
+        buf.append(0xa0 | n)
+    elif n < 0x100:
+        buf += b"\xd9" + struct.pack(">B", n)
+    elif n < 0x10000:
+        buf += b"\xda" + struct.pack(">H", n)
+    else:
+        buf += b"\xdb" + struct.pack(">I", n)
+    buf += b
+
+def _pack_array_header(n: int, buf: bytearray) -> None:
+    if n < 16:
+        buf.append(0x90 | n)
+    elif n < 0x10000:
+        buf += b"\xdc" + struct.pack(">H", n)
+    else:
+        buf += b"\xdd" + struct.pack(">I", n)
+
+def _pack(obj: Any, buf: bytearray) -> None:
+    t = type(obj)
+    if t is str:
+        _pack_str(obj, buf)
+    elif t is int:
+        _pack_int(obj, buf)
+    elif obj is None:
+        buf.append(0xc0)
+    elif t is bool:
+        buf.append(0xc3 if obj else 0xc2)
+    elif t is float:
+        buf += b"\xcb" + struct.pack(">d", obj)
+    elif t is list or t is tuple:
+        _pack_array_header(len(obj), buf)
+        for item in obj:
+            _pack(item, buf)
+    elif t is dict:
+        n = len(obj)
+        if n < 16:
+            buf.append(0x80 | n)
+        elif n < 0x10000:
+            buf += b"\xde" + struct.pack(">H", n)
+        else:
+            buf += b"\xdf" + struct.pack(">I", n)
+        for k, v in obj.items():
+            _pack(k, buf)
+            _pack(v, buf)
+    elif t is bytes or t is bytearray:
+        n = len(obj)
+        if n < 0x100:
+            buf += b"\xc4" + struct.pack(">B", n)
+        elif n < 0x10000:
+            buf += b"\xc5" + struct.pack(">H", n)
+        else:
+            buf += b"\xc6" + struct.pack(">I", n)
+        buf += obj
+    elif isinstance(obj, int):
+        _pack_int(int(obj), buf)
+    else:
+        raise TypeError(f"wire: cannot pack {t.__name__}")
+
+def packb(obj: Any) -> bytes:
+    buf = bytearray()
+    _pack(obj, buf)
+    return bytes(buf)
+
+# ---------------------------------------------------------------------------
+# MessagePack decode
+# ---------------------------------------------------------------------------
+
+_FIXED = {
+    0xcc: ">B", 0xcd: ">H", 0xce: ">I", 0xcf: ">Q",
+    0xd0: ">b", 0xd1: ">h", 0xd2: ">i", 0xd3: ">q",
+    0xca: ">f", 0xcb: ">d",
+}
+
+def _unpack(data: bytes, pos: int) -> Tuple[Any, int]:
+    b = data[pos]
+    pos += 1
+    if b < 0x80:
+        return b, pos
+    if b >= 0xe0:
+        return b - 0x100, pos
+    if 0xa0 <= b <= 0xbf:
+        n = b & 0x1f
+        return data[pos:pos + n].decode("utf-8"), pos + n
+    if 0x90 <= b <= 0x9f:
+        return _unpack_array(data, pos, b & 0x0f)
+    if 0x80 <= b <= 0x8f:
+        return _unpack_map(data, pos, b & 0x0f)
+    if b == 0xc0:
+        return None, pos
+    if b == 0xc2:
+        return False, pos
+    if b == 0xc3:
+        return True, pos
+    fmt = _FIXED.get(b)
+    if fmt is not None:
+        size = struct.calcsize(fmt)
+        return struct.unpack_from(fmt, data, pos)[0], pos + size
+    if b in (0xd9, 0xda, 0xdb, 0xc4, 0xc5, 0xc6):
+        fmt = ">B" if b in (0xd9, 0xc4) else ">H" if b in (0xda, 0xc5) else ">I"
+        n = struct.unpack_from(fmt, data, pos)[0]
+        pos += struct.calcsize(fmt)
+        raw = data[pos:pos + n]
+        return (raw.decode("utf-8") if b >= 0xd9 else bytes(raw)), pos + n
+    if b in (0xdc, 0xdd):
+        fmt = ">H" if b == 0xdc else ">I"
+        n = struct.unpack_from(fmt, data, pos)[0]
+        return _unpack_array(data, pos + struct.calcsize(fmt), n)
+    if b in (0xde, 0xdf):
+        fmt = ">H" if b == 0xde else ">I"
+        n = struct.unpack_from(fmt, data, pos)[0]
+        return _unpack_map(data, pos + struct.calcsize(fmt), n)
+    raise ValueError(f"wire: unsupported type byte 0x{b:02x}")
+
+def _unpack_array(data: bytes, pos: int, n: int) -> Tuple[list, int]:
+    out = []
+    for _ in range(n):
+        item, pos = _unpack(data, pos)
+        out.append(item)
+    return out, pos
+
+def _unpack_map(data: bytes, pos: int, n: int) -> Tuple[dict, int]:
+    out = {}
+    for _ in range(n):
+        k, pos = _unpack(data, pos)
+        v, pos = _unpack(data, pos)
+        out[k] = v
+    return out, pos
+
+def unpackb(data: bytes) -> Any:
+    obj, pos = _unpack(data, 0)
+    if pos != len(data):
+        raise ValueError("wire: trailing bytes")
+    return obj
+
+# ---------------------------------------------------------------------------
+# Frontend mesajları (v1 şeması)
+# ---------------------------------------------------------------------------
+
+# JS Number'ın birebir temsil edebildiği en büyük tamsayı; üstü string kalır
+_JS_MAX_SAFE_INT = 2 ** 53 - 1
+
+def _gid(gid: str) -> Any:
+    # "12345" -> 12345 (baştaki sıfır kaybolmasın diye sadece kanonik sayılar)
+    if gid.isdigit() and len(gid) < 17 and (gid[0] != "0" or gid == "0"):
+        n = int(gid)
+        if n <= _JS_MAX_SAFE_INT:
+            return n
+    return gid
+
+def _match_row(m: dict) -> list:
+    return [_gid(m["game_id"]), m["team1"], m["team2"], m["score1"], m["score2"], m["minute"],
+            m["sport"], m["tournament"], m["is_live"], m["last_update_ms"]]
+
+def _event_row(e: dict) -> list:
+    return [_gid(e["game_id"]), e["etype"], e["team"], e["ts"], e["seq"]]
+
+def encode_front(msg: dict) -> bytes:
+    """Frontend mesajını (JSON ile aynı dict) v1 şemasıyla binary'ye çevir"""
+    mtype = msg.get("type")
+    if mtype == "matches":
+        msg = dict(msg, matches=[_match_row(m) for m in msg["matches"]])
+    elif mtype == "matches_delta":
+        msg = dict(msg, upserts=[_match_row(m) for m in msg["upserts"]],
+                   removed=[_gid(g) for g in msg["removed"]])
+        if "order" in msg:
+            msg["order"] = [_gid(g) for g in msg["order"]]
+    elif mtype == "events":
+        msg = dict(msg, events=[_event_row(e) for e in msg["events"]])
+    return packb(msg)
+
+_BATCH_HEAD = bytes(packb({"type": "batch", "messages": []})[:-1])
+
+def pack_batch(parts: List[bytes]) -> bytes:
+    """Önceden encode edilmiş mesajları tekrar pack etmeden tek batch'te birleştir"""
+    buf = bytearray(_BATCH_HEAD)
+    _pack_array_header(len(parts), buf)
+    for p in parts:
+        buf += p
+    return bytes(buf)
+
+# ---------------------------------------------------------------------------
+# Ingest v2
+#   batch  := "MI2" count:u16 record*
+#   record := kind:u8 sport:u8 seq:u32 captured_ms:u64 gid_len:u8 gid payload_len:u32 payload
+# ---------------------------------------------------------------------------
+
+INGEST_MAGIC = b"MI2"
+KIND_SWARM = 1
+KIND_ANIM = 2
+INGEST_KINDS = {"swarm_recv": KIND_SWARM, "anim": KIND_ANIM}
+SOURCE_SPORTS = {"": 0, "Soccer": 1, "Basketball": 2}
+
+_BATCH_COUNT = struct.Struct(">H")
+_RECORD_HEAD = struct.Struct(">BBIQB")
+_PAYLOAD_LEN = struct.Struct(">I")
+
+class IngestRecord(NamedTuple):
+    kind: int
+    sport: int
+    seq: int
+    captured_ms: int
+    game_id: str
+    payload: Union[bytes, str]
+
+def pack_ingest(records: List[IngestRecord]) -> bytes:
+    parts = [INGEST_MAGIC, _BATCH_COUNT.pack(len(records))]
+    for r in records:
+        gid = r.game_id.encode("utf-8")
+        payload = r.payload.encode("utf-8") if isinstance(r.payload, str) else r.payload
+        parts.append(_RECORD_HEAD.pack(r.kind, r.sport, r.seq & 0xffffffff, r.captured_ms, len(gid)))
+        parts.append(gid)
+        parts.append(_PAYLOAD_LEN.pack(len(payload)))
+        parts.append(payload)
+    return b"".join(parts)
+
+def unpack_ingest(data: bytes) -> List[IngestRecord]:
+    """Bozuk/eksik batch'te ValueError"""
+    if data[:3] != INGEST_MAGIC:
+        raise ValueError("wire: not an ingest v2 batch")
+    out: List[IngestRecord] = []
+    try:
+        count = _BATCH_COUNT.unpack_from(data, 3)[0]
+        pos = 3 + _BATCH_COUNT.size
+        for _ in range(count):
+            kind, sport, seq, captured_ms, gid_len = _RECORD_HEAD.unpack_from(data, pos)
+            pos += _RECORD_HEAD.size
+            gid = data[pos:pos + gid_len].decode("utf-8")
+            pos += gid_len
+            n = _PAYLOAD_LEN.unpack_from(data, pos)[0]
+            pos += _PAYLOAD_LEN.size
+            if pos + n > len(data):
+                raise ValueError("wire: truncated ingest record")
+            out.append(IngestRecord(kind, sport, seq, captured_ms, gid, data[pos:pos + n]))
+            pos += n
+    except struct.error as e:
+        raise ValueError(f"wire: truncated ingest batch ({e})") from None
+    if pos != len(data):
+        raise ValueError("wire: trailing bytes")
+    return out